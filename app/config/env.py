@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Literal
 import os
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -38,6 +38,26 @@ class Settings(BaseSettings):
   jwt_global_enable: bool = Field(..., env="JWT_GLOBAL_ENABLE")
   jwt_white_list: List[str] = Field(..., env="JWT_WHITE_LIST")
 
+  # id生成方式：uuid由MySQL的uuid()生成（每次需要查询数据库），ulid/snowflake在进程内生成有时间顺序的id
+  id_generator: Literal["uuid", "ulid", "snowflake"] = Field(default="ulid", env="ID_GENERATOR")
+
+  # 每个请求允许执行的SQL数量，0表示不限制；超过时log模式只打印日志，raise模式（测试环境使用）让请求失败
+  db_query_budget: int = Field(default=0, env="DB_QUERY_BUDGET")
+  db_query_budget_mode: Literal["log", "raise"] = Field(default="log", env="DB_QUERY_BUDGET_MODE")
+  # 同一种SQL在一个请求内执行次数达到该值时视为N+1查询并打印日志
+  db_repeat_query_threshold: int = Field(default=5, env="DB_REPEAT_QUERY_THRESHOLD")
+  # 是否由SQLAlchemy同步打印所有SQL，只在本地调试时开启，生产环境使用慢查询日志
+  db_echo: bool = Field(default=False, env="DB_ECHO")
+  # 慢查询日志：耗时达到阈值（毫秒）的SQL按抽样比例写入日志文件，可选记录SELECT语句的EXPLAIN执行计划
+  slow_query_log_file: str = Field(default="./logs/slow_query.log", env="SLOW_QUERY_LOG_FILE")
+  slow_query_threshold_ms: float = Field(default=200, env="SLOW_QUERY_THRESHOLD_MS")
+  slow_query_sample_rate: float = Field(default=1.0, env="SLOW_QUERY_SAMPLE_RATE")
+  slow_query_explain: bool = Field(default=False, env="SLOW_QUERY_EXPLAIN")
+  # 只读副本的连接地址列表（与DATABASE_URL格式相同），ModelService的读操作轮询使用；为空时读写都使用主库
+  db_replica_urls: List[str] = Field(default=[], env="DB_REPLICA_URLS")
+  # 表被写入后该时间（秒）内的读操作仍使用主库，避免副本复制延迟导致读不到刚写入的数据
+  db_read_after_write_seconds: float = Field(default=2, env="DB_READ_AFTER_WRITE_SECONDS")
+
   class Config:
     # 优先使用环境变量指定的 env 文件，如果没有指定则使用默认的 .env
     env_file = os.getenv("ENV_FILE", ".env")
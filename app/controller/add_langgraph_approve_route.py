@@ -132,8 +132,9 @@ def create_graph(
       "id": state_message_dict.get('id'),
       "status": "proceeded"
     }
-    update_message_cls = await LgMessageService.item_update(session=session, row_dict=update_message_dict)
-    update_message_dict = update_message_cls.model_dump()
+    # 直接模式更新，不查询记录，返回值只包含更新的字段，与状态中的消息合并
+    update_message_cls = await LgMessageService.item_update(session=session, row_dict=update_message_dict, direct=True)
+    update_message_dict = {**state_message_dict, **update_message_cls}
     print('update_message_cls:', update_message_cls)
     if approve_flag == 'Y':
       return Command(
@@ -159,10 +160,10 @@ def create_graph(
       "status": "accept_approval",
       "result_content": '审批通过......',
     }
-    update_approve_cls = await LgApproveService.item_update(session=session, row_dict=update_approve_dict)
+    update_approve_cls = await LgApproveService.item_update(session=session, row_dict=update_approve_dict, direct=True)
     print('node_approve_accept:', update_approve_cls)
     return {
-      "approve": update_approve_cls.model_dump(),
+      "approve": {**state.get('approve'), **update_approve_cls},
       "log_list": [f"node_approve_accept：审批通过，等待财务打款"],
     }
 
@@ -173,10 +174,10 @@ def create_graph(
       "status": "reject_approval",
       "result_content": '审批拒绝......',
     }
-    update_approve_cls = await LgApproveService.item_update(session=session, row_dict=update_approve_dict)
+    update_approve_cls = await LgApproveService.item_update(session=session, row_dict=update_approve_dict, direct=True)
     print('node_approve_reject:', update_approve_cls)
     return {
-      "approve": update_approve_cls.model_dump(),
+      "approve": {**state.get('approve'), **update_approve_cls},
       "log_list": [f"node_approve_accept：审批已经被拒绝"],
     }
 
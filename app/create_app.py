@@ -7,21 +7,26 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
 
 from app.config.env import env
-from app.utils.db_utils import check_database_connection
+from app.utils.db_utils import check_database_connection, engine_router
+from app.utils.hook_worker import hook_worker_pool
 from app.utils.postgres_checkpointer import check_postgres_connection
 from app.utils.redis_utils import check_redis_connection, RedisManager
+from app.utils.slow_query_log import slow_query_log
 
 
 def create_app():
   @asynccontextmanager
   async def lifespan(app: FastAPI):
     print("lifespan：应用启动阶段")
-    async_engine = await check_database_connection()
+    await check_database_connection()
     await check_postgres_connection()
     await check_redis_connection()
     yield
     print("lifespan：应用销毁阶段")
-    await async_engine.dispose()
+    # 等待延迟执行的钩子全部执行完毕，再关闭数据库连接（主库和只读副本）
+    await hook_worker_pool.drain()
+    await engine_router.dispose()
+    slow_query_log.close()
     await RedisManager.close_instance()
   async def verify_token(x_token: Annotated[str, Header()]):
       if x_token != "fake-super-secret-token":
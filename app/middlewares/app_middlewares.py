@@ -8,7 +8,8 @@ from starlette.responses import JSONResponse
 
 from app.config.env import env
 from app.controller.add_user_route import unauthorized_exception, get_current_user
-from app.utils.db_utils import async_session
+from app.utils.db_utils import async_session, use_primary
+from app.utils.query_stats import QueryStats, current_query_stats
 
 
 def add_app_middlewares(app: FastAPI):
@@ -30,6 +31,13 @@ def add_app_middlewares(app: FastAPI):
   #   print("middleware2 end")
   #   return response
 
+  # 请求头带有X-DB-Primary时，该请求的读操作固定使用主库（刚写入数据后需要立即读取时使用）
+  @app.middleware("http")
+  async def stick_to_primary(request: Request, call_next):
+    if request.headers.get("X-DB-Primary"):
+      use_primary.set(True)
+    return await call_next(request)
+
   """
   定义一个 HTTP 请求级别的中间件函数，
   所有经过 FastAPI 的 HTTP 请求都会先经过这个函数，
@@ -73,3 +81,28 @@ def add_app_middlewares(app: FastAPI):
       else:
         raise e
     return response
+
+  # 统计请求执行的SQL数量和数据库耗时，写入响应头X-DB-Query-Count/X-DB-Time；
+  # 最后注册，位于最外层，认证中间件查询用户的SQL也计入统计
+  @app.middleware("http")
+  async def add_query_stats_header(request: Request, call_next):
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+      response = await call_next(request)
+    finally:
+      current_query_stats.reset(token)
+    response.headers['X-DB-Query-Count'] = str(stats.count)
+    response.headers['X-DB-Time'] = f"{stats.seconds * 1000:.2f}ms"
+    if stats.count == 0:
+      return response
+
+    print(f"SQL {request.method} {request.url.path}: {stats.count}条, {stats.seconds * 1000:.2f}ms")
+    if 0 < env.db_query_budget < stats.count:
+      print(f"❌ {request.method} {request.url.path} 执行了{stats.count}条SQL，超过限制{env.db_query_budget}")
+    repeated_shapes = stats.repeated_shapes(env.db_repeat_query_threshold)
+    if repeated_shapes:
+      response.headers['X-DB-Repeated-Queries'] = str(len(repeated_shapes))
+      for statement, count in repeated_shapes:
+        print(f"❌ 疑似N+1查询 {request.method} {request.url.path}: 以下SQL重复执行{count}次\n{statement}")
+    return response
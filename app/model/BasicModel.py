@@ -3,6 +3,8 @@ from datetime import datetime, timezone, timedelta, date
 from pydantic import model_validator
 from sqlmodel import SQLModel, Field
 
+from app.utils.model_registry import get_model_meta
+
 # 定义北京时区（UTC+8）
 beijing_timezone = timezone(timedelta(hours=8))
 
@@ -15,7 +17,8 @@ class BasicModel(SQLModel):
   # 唯一标识字段，主键，默认为None（通常由系统生成），描述为“唯一标识，编号”
   id: str = Field(default=None, primary_key=True, description="唯一标识，编号")
   # 创建时间字段，默认值为当前北京时区时间，描述为“创建时间”
-  created_at: datetime = Field(default_factory=current_datetime, description="创建时间")
+  # 分页查询默认按 created_at, id 排序并按游标翻页，InnoDB的二级索引末尾自带主键，该索引即相当于 (created_at, id)
+  created_at: datetime = Field(default_factory=current_datetime, index=True, description="创建时间")
   # 更新时间字段，默认值为当前北京时区时间，描述为“更新时间”
   updated_at: datetime = Field(default_factory=current_datetime, description="更新时间")
   # 创建人ID字段，默认为None，描述为“创建人id”
@@ -37,21 +40,22 @@ class BasicModel(SQLModel):
   # 定义模型验证器，在数据解析前（mode='before'）执行，用于处理字符串格式的日期时间
   @model_validator(mode='before')
   def parse_string_datetimes(cls, data: dict) -> dict:
+    # 传入的不是字典（例如其他模型实例）时不做处理，交给pydantic按属性校验
+    if not isinstance(data, dict):
+      return data
+    # datetime/date类型的字段集合从模型元数据中获取，只在模型第一次校验时计算一次
+    meta = get_model_meta(cls)
     # 处理datetime类型字段：将字符串格式的日期时间转换为datetime对象
     datetime_fields = {
-      k: datetime.strptime(v, "%Y-%m-%d %H:%M:%S")  # 使用strptime解析字符串为datetime
-      for k, v in data.items()  # 遍历输入数据的键值对
-      if isinstance(v, str)  # 只处理值为字符串的项
-         and k in cls.model_fields  # 键必须是模型中定义的字段
-         and cls.model_fields[k].annotation is datetime  # 字段的注解类型是datetime
+      k: datetime.strptime(data[k], "%Y-%m-%d %H:%M:%S")  # 使用strptime解析字符串为datetime
+      for k in meta.datetime_fields  # 遍历模型中注解类型是datetime的字段
+      if isinstance(data.get(k), str)  # 只处理值为字符串的项
     }
     # 处理date类型字段：将字符串格式的日期转换为date对象（通过datetime解析后取date部分）
     date_fields = {
-      k: datetime.strptime(v, "%Y-%m-%d").date()  # 使用strptime解析字符串为datetime后取date
-      for k, v in data.items()  # 遍历输入数据的键值对
-      if isinstance(v, str)  # 只处理值为字符串的项
-         and k in cls.model_fields  # 键必须是模型中定义的字段
-         and cls.model_fields[k].annotation is date  # 字段的注解类型是date
+      k: datetime.strptime(data[k], "%Y-%m-%d").date()  # 使用strptime解析字符串为datetime后取date
+      for k in meta.date_fields  # 遍历模型中注解类型是date的字段
+      if isinstance(data.get(k), str)  # 只处理值为字符串的项
     }
     # 打印转换后的datetime字段，用于调试
     # print("datetime_fields", datetime_fields)
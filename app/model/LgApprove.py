@@ -2,6 +2,7 @@ from sqlmodel import Field
 from sqlalchemy import Text, Column
 from app.model.BasicModel import BasicModel
 from app.utils.create_module_service import create_model_service
+from app.utils.list_cache import ListCache
 
 
 class LgApprove(BasicModel, table=True):
@@ -12,4 +13,5 @@ class LgApprove(BasicModel, table=True):
   result_content: str = Field(default=None, description="审批结果信息", sa_column=Column("result_content", Text, nullable=True))
 
 
-LgApproveService = create_model_service(LgApprove)
+# 看板会高频轮询分页接口，开启分页结果缓存，并使用core查询模式跳过ORM实例化
+LgApproveService = create_model_service(LgApprove, list_cache=ListCache(), read_mode='core')
@@ -2,6 +2,7 @@ from sqlmodel import Field
 from sqlalchemy import Text, Column
 from app.model.BasicModel import BasicModel
 from app.utils.create_module_service import create_model_service
+from app.utils.list_cache import ListCache
 
 
 class LgMessage(BasicModel, table=True):
@@ -13,4 +14,5 @@ class LgMessage(BasicModel, table=True):
   render_configs: str = Field(default=None, description="渲染配置", sa_column=Column("render_configs", Text, nullable=True))
 
 
-LgMessageService = create_model_service(LgMessage)
+# 看板会高频轮询分页接口，开启分页结果缓存，并使用core查询模式跳过ORM实例化
+LgMessageService = create_model_service(LgMessage, list_cache=ListCache(), read_mode='core')
@@ -4,6 +4,7 @@ from sqlmodel import Field
 
 from app.model.BasicModel import BasicModel
 from app.utils.create_module_service import create_model_service
+from app.utils.list_cache import ListCache
 
 
 class LlmOrder(BasicModel, table=True):
@@ -13,4 +14,5 @@ class LlmOrder(BasicModel, table=True):
   user_id: str = Field(default=None, description="用户ID")
 
 
-LlmOrderService = create_model_service(LlmOrder)
+# 报表任务按商品统计订单数，开启聚合结果缓存
+LlmOrderService = create_model_service(LlmOrder, bulk_insert=True, aggregate_cache=ListCache(ttl=300, key_prefix="aggregate_cache"))
@@ -4,6 +4,7 @@ from sqlmodel import Field
 
 from app.model.BasicModel import BasicModel
 from app.utils.create_module_service import create_model_service
+from app.utils.item_cache import ItemCache
 
 
 class LlmProduct(BasicModel, table=True):
@@ -15,4 +16,5 @@ class LlmProduct(BasicModel, table=True):
   valid_end: datetime = Field(default=None, description="商品有效结束时间")
 
 
-LlmProductService = create_model_service(LlmProduct)
+# 商品数据读多写少，开启单条查询缓存
+LlmProductService = create_model_service(LlmProduct, item_cache=ItemCache())
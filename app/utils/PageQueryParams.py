@@ -1,3 +1,8 @@
+import base64
+import json
+from datetime import datetime, date
+from typing import Any, Literal, List
+
 from pydantic import BaseModel, Field
 
 
@@ -7,8 +12,49 @@ class PageQueryParams(BaseModel):
 
   all: bool = Field(default=False, description="是否查询所有数据，也就是不分页")
   count: bool = Field(default=True, description="是否查询总数")
+  count_mode: Literal["exact", "estimate"] = Field(default="exact", description="总数查询方式：exact精确统计（带缓存），estimate无筛选条件时读取表统计信息中的估算行数")
 
   sort_field: str = Field(default="created_at", description="排序字段")
   sort_desc: str = Field(default="desc", description="排序方式")
 
-  filters: dict = Field(default=None, description="筛选参数")
+  filters: dict = Field(default=None, description="筛选参数，值为普通值时按等于筛选，值为操作符字典时支持 eq/in/between/gte/lte/prefix/is_null，详见filter_dsl")
+
+  fields: List[str] | None = Field(default=None, description="只查询返回的字段列表，不传时返回全部字段；id和排序字段始终返回")
+  include: List[str] | None = Field(default=None, description="同时查询返回的关系属性列表（例如User的roles），使用selectinload批量加载，不能与fields同时使用")
+
+  cursor: str | None = Field(default=None, description="游标分页参数，传入上一页返回的next_cursor，传入后忽略page参数")
+
+
+# 将最后一条记录的(排序字段值, id)编码为不透明的游标字符串
+def encode_cursor(sort_value: Any, id_value: Any) -> str:
+  # datetime/date类型无法直接json序列化，转换为iso格式字符串
+  if isinstance(sort_value, (datetime, date)):
+    sort_value = sort_value.isoformat()
+  raw = json.dumps([sort_value, id_value], ensure_ascii=False)
+  return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+# 解析游标字符串，返回(排序字段值, id)，python_type为排序字段的python类型，用于还原datetime/date
+def decode_cursor(cursor: str, python_type: type = None) -> tuple[Any, Any]:
+  try:
+    sort_value, id_value = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+  except (ValueError, TypeError) as e:
+    raise ValueError(f"Invalid cursor: {cursor}") from e
+  if isinstance(sort_value, str) and python_type is datetime:
+    sort_value = datetime.fromisoformat(sort_value)
+  elif isinstance(sort_value, str) and python_type is date:
+    sort_value = date.fromisoformat(sort_value)
+  return sort_value, id_value
+
+
+class AggregateItem(BaseModel):
+  func: Literal["count", "sum", "avg", "min", "max"] = Field(description="聚合函数")
+  field: str | None = Field(default=None, description="聚合的字段，count不传时为count(*)")
+  alias: str | None = Field(default=None, description="结果中的字段名，不传时为 函数名_字段名，count(*)为count")
+
+
+class AggregateQueryParams(BaseModel):
+  group_by: List[str] = Field(default=[], description="分组字段列表，不传时对全部筛选结果聚合")
+  aggregates: List[AggregateItem] = Field(default=[AggregateItem(func="count")], description="聚合函数列表，默认为count(*)")
+  filters: dict = Field(default=None, description="筛选参数，规则与分页查询的filters相同，详见filter_dsl")
+  limit: int | None = Field(default=None, description="最多返回的分组数量")
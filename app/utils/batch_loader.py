@@ -0,0 +1,80 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class BatchLoader:
+  """
+  按key批量加载数据的合并器（DataLoader）
+  在wait秒的时间窗口内并发到达的单个key查询会被合并为一次批量查询，同一个key只查询一次；
+  窗口内的key数量达到max_batch_size时立即查询。只在当前进程内合并，多个worker之间互不影响
+  batch_load_fn接收key列表，返回 key -> 值 的字典，不存在的key返回None
+  """
+
+  def __init__(
+    self,
+    batch_load_fn: Callable[[List[Any]], Awaitable[Dict[Any, Any]]],
+    wait: float = 0.002,  # 合并查询的时间窗口（秒）
+    max_batch_size: int = 500,  # 每次批量查询的最大key数量
+  ):
+    self.batch_load_fn = batch_load_fn
+    self.wait = wait
+    self.max_batch_size = max_batch_size
+    # 等待查询的key -> 查询结果
+    self._pending: Dict[Any, asyncio.Future] = {}
+    self._flush_handle: Optional[asyncio.TimerHandle] = None
+    # 正在执行的批量查询任务，保存引用避免任务被垃圾回收
+    self._tasks = set()
+    # 单个key的查询次数 / 实际执行的批量查询次数
+    self.load_count = 0
+    self.batch_count = 0
+
+  async def load(self, key: Any) -> Any:
+    self.load_count += 1
+    future = self._pending.get(key)
+    if future is None:
+      loop = asyncio.get_running_loop()
+      future = loop.create_future()
+      self._pending[key] = future
+      if len(self._pending) >= self.max_batch_size:
+        self._dispatch()
+      elif self._flush_handle is None:
+        self._flush_handle = loop.call_later(self.wait, self._dispatch)
+    # 同一个key的结果由多个调用方共享，某个调用方被取消时不能取消共享的结果
+    return await asyncio.shield(future)
+
+  async def load_many(self, key_list: List[Any]) -> List[Any]:
+    return list(await asyncio.gather(*[self.load(key) for key in key_list]))
+
+  # 取出当前窗口内的所有key，创建任务执行批量查询
+  # 合并的查询来自多个请求，任务在空的上下文中执行，不继承触发查询的请求的上下文变量
+  def _dispatch(self):
+    if self._flush_handle is not None:
+      self._flush_handle.cancel()
+      self._flush_handle = None
+    pending, self._pending = self._pending, {}
+    if pending:
+      task = asyncio.create_task(self._run(pending), context=contextvars.Context())
+      self._tasks.add(task)
+      task.add_done_callback(self._tasks.discard)
+
+  async def _run(self, pending: Dict[Any, asyncio.Future]):
+    self.batch_count += 1
+    try:
+      result = await self.batch_load_fn(list(pending.keys()))
+    except Exception as e:
+      # 批量查询失败时，窗口内的所有调用方都收到该异常
+      for future in pending.values():
+        if not future.done():
+          future.set_exception(e)
+      return
+    for key, future in pending.items():
+      if not future.done():
+        future.set_result(result.get(key))
+
+  def stats(self) -> dict:
+    return {
+      "loads": self.load_count,
+      "batches": self.batch_count,
+      "pending": len(self._pending),
+    }
@@ -0,0 +1,40 @@
+import json
+import time
+from typing import Optional, Dict, Tuple
+
+
+class CountCache:
+  """
+  分页查询总数缓存（进程内）
+  按 表名 + 规范化后的筛选条件 缓存 SELECT COUNT(*) 的结果，
+  ModelService 的写操作会按表名整体失效，过期时间用于兜底其他途径（原生SQL等）对表的修改
+  """
+  # 表名 -> { 筛选条件key -> (过期时间戳, 总数) }
+  _store: Dict[str, Dict[str, Tuple[float, int]]] = {}
+  # 缓存有效期（秒）
+  ttl: float = 30
+
+  @staticmethod
+  def make_key(filters: Optional[dict]) -> str:
+    # 对筛选条件排序后序列化，保证相同条件不同键顺序得到相同的key
+    return json.dumps(filters or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+  @staticmethod
+  def get(table_name: str, filters: Optional[dict]) -> Optional[int]:
+    entry = CountCache._store.get(table_name, {}).get(CountCache.make_key(filters))
+    if entry is None:
+      return None
+    expire_at, total = entry
+    if expire_at < time.monotonic():
+      CountCache._store[table_name].pop(CountCache.make_key(filters), None)
+      return None
+    return total
+
+  @staticmethod
+  def set(table_name: str, filters: Optional[dict], total: int):
+    CountCache._store.setdefault(table_name, {})[CountCache.make_key(filters)] = (time.monotonic() + CountCache.ttl, total)
+
+  @staticmethod
+  def invalidate(table_name: str):
+    # 表数据发生变化，清空该表的所有总数缓存
+    CountCache._store.pop(table_name, None)
@@ -1,22 +1,120 @@
-import asyncio
+import csv
+import io
 import json
-from typing import Type, List, Any, Union
-
-from fastapi import FastAPI, APIRouter, HTTPException, Body
-from pydantic import create_model
-from sqlalchemy import func
+import zlib
+from collections import OrderedDict
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Type, List, Any, Union, Literal, Optional, Annotated
+
+from fastapi import FastAPI, APIRouter, HTTPException, Body, Request, Query, Depends
+from fastapi.responses import Response, StreamingResponse
+from pydantic import create_model, TypeAdapter, ValidationError
+from sqlalchemy import func, or_, and_, text, case, update, delete, insert, inspect as sa_inspect
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import selectinload
 from sqlmodel import select
-
-from app.model.BasicModel import BasicModel
-from app.utils.PageQueryParams import PageQueryParams
-from app.utils.db_utils import AsyncSessionDep
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.model.BasicModel import BasicModel, current_datetime
+from app.utils.PageQueryParams import PageQueryParams, AggregateQueryParams, encode_cursor, decode_cursor
+from app.utils.batch_loader import BatchLoader
+from app.utils.count_cache import CountCache
+from app.utils.filter_dsl import FilterCompiler
+from app.utils.hook_worker import hook_worker_pool
+from app.utils.model_registry import get_model_meta
+from app.utils.json_response import FastJSONResponse, orjson_dumps
+from app.utils.row_serializer import build_row_serializers, build_model_serializers
+from app.utils.db_utils import AsyncSessionDep, async_session, engine_router, read_session, is_replica_session
 from app.utils.next_id import next_id
 
+# 批量写操作每条SQL语句处理的最大记录数，避免单条语句过大
+BATCH_CHUNK_SIZE = 500
+# upsert命中已存在记录时不覆盖的字段
+UPSERT_IGNORE_UPDATE_COLUMNS = ('id', 'created_at', 'created_by')
+
+
+# 聚合接口支持的聚合函数，sum/avg只允许用于数值字段
+AGGREGATE_FUNCTIONS = {
+  'count': func.count,
+  'sum': func.sum,
+  'avg': func.avg,
+  'min': func.min,
+  'max': func.max,
+}
+NUMERIC_AGGREGATE_FUNCTIONS = ('sum', 'avg')
+
+# 导出接口每次从服务端游标读取并输出的记录数
+EXPORT_CHUNK_SIZE = 1000
+
+# 按字段组合/关系属性组合缓存的查询语句和序列化器的最大数量，超出后淘汰最久未使用的组合
+PROJECTION_CACHE_SIZE = 256
+
+
+# 从LRU缓存中获取key对应的值，不存在时调用build创建并写入，超出max_size时淘汰最久未使用的值
+def lru_get(cache: OrderedDict, key, build, max_size: int = PROJECTION_CACHE_SIZE):
+  value = cache.get(key)
+  if value is None:
+    value = build()
+    cache[key] = value
+    while len(cache) > max_size:
+      cache.popitem(last=False)
+  else:
+    cache.move_to_end(key)
+  return value
+
+
+# 导出数据时的字段值格式化，日期时间格式与接口返回保持一致
+def format_export_value(value):
+  if value is None:
+    return ""
+  if isinstance(value, datetime):
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+  if isinstance(value, date):
+    return value.strftime("%Y-%m-%d")
+  return value
+
+
+# 导入接口默认每批校验并提交的记录数
+IMPORT_CHUNK_SIZE = 1000
+
+
+# 逐块读取请求体并按行切分NDJSON，请求体为gzip压缩时（Content-Encoding: gzip或gzip文件头）边读取边解压
+async def iter_ndjson_lines(request: Request):
+  decompressor = None
+  is_first_chunk = True
+  buffer = b""
+  async for chunk in request.stream():
+    if not chunk:
+      continue
+    if is_first_chunk:
+      is_first_chunk = False
+      if request.headers.get("content-encoding") == "gzip" or chunk[:2] == b"\x1f\x8b":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    buffer += decompressor.decompress(chunk) if decompressor is not None else chunk
+    *line_list, buffer = buffer.split(b"\n")
+    for line in line_list:
+      if line.strip():
+        yield line
+  if decompressor is not None:
+    buffer += decompressor.flush()
+  for line in buffer.split(b"\n"):
+    if line.strip():
+      yield line
+
+
+# 标记after_update/after_delete钩子需要完整的记录实例
+# 直接模式下单条更新/删除不会查询记录，钩子默认收到的是合并后的字典；使用该装饰器标记的钩子会额外查询一次完整记录
+def require_full_object(hook):
+  hook.require_full_object = True
+  return hook
+
 
 def create_model_service(
   #/*@formatter:off*/
   Cls: Type[BasicModel],              # model实体类
 
+  # 写操作的after钩子（after_insert/after_update/after_delete/after_batch_*）可以使用hook_worker.deferred_hook标记为事务提交后在后台工作池中执行
   before_query_list=None,             # 分页查询前异步处理函数，参数：(query_param, session)
   after_query_list=None,              # 分页查询后异步处理函数，参数：(query_cls_list, has_next, query_param, session)
   before_query_item=None,             # 单条查询前异步处理函数，参数：(row_dict, session)
@@ -33,13 +131,22 @@ def create_model_service(
   before_batch_update=None,           # 批量更新前异步处理函数，参数：(row_dict_list, session)
   after_batch_update=None,            # 批量更新后异步处理函数，参数：(refresh_cls_list, row_dict_list, session)
   before_batch_delete=None,           # 批量删除前异步处理函数，参数：(row_dict_list, session)
-  after_batch_delete=None,            # 批量删除后异步处理函数，参数：(delete_cls_list, row_dict_list, session)
+  after_batch_delete=None,            # 批量删除后异步处理函数，参数：(delete_id_list, row_dict_list, session)
+
+  item_cache=None,                    # 单条查询缓存，传入ItemCache实例开启，按id查询时优先读缓存，更新/删除时自动失效
+  list_cache=None,                    # 分页查询结果缓存，传入ListCache实例开启，命中缓存时不执行before/after_query_list
+  aggregate_cache=None,               # 聚合查询结果缓存，传入ListCache实例开启，表数据发生写操作时整体失效
+  bulk_insert=False,                  # 批量新建是否使用高性能模式：TypeAdapter校验 + Core多行INSERT，不经过ORM，无服务端生成字段时不再回查
+  sortable_fields=(),                 # 除有索引的列之外额外允许排序的字段（分页查询的默认排序字段created_at在BasicModel中已有索引）
+  allow_unindexed_sort=False,         # 是否允许按没有索引的列排序
+  direct_write=False,                 # 单条更新/删除是否默认使用直接模式：一条 UPDATE/DELETE ... WHERE id = :id，按影响行数判断记录是否存在，更新返回合并后的字典
+  read_mode='orm',                    # 分页/单条查询模式：orm查询模型实例；core使用Core查询直接得到字典行，并用预先创建的序列化器输出JSON，跳过ORM实例化和响应模型校验，此时查询钩子收到的是字典
   # /*@formatter:on*/
 ):
   # 定义模型服务类，封装模型相关的CRUD接口及业务逻辑
   class ModelService:
     # 支持的所有端点列表，包含常用的CRUD及批量操作
-    END_POINTS = ['list', 'item', 'insert', 'batch_insert', 'update', 'batch_update', 'delete', 'batch_delete']
+    END_POINTS = ['list', 'item', 'items_by_ids', 'aggregate', 'insert', 'batch_insert', 'update', 'batch_update', 'delete', 'batch_delete', 'upsert', 'batch_upsert', 'export', 'import']
 
     def __init__(self):
       # 验证传入的模型类是否继承自BasicModel，确保基础字段存在
@@ -47,13 +154,57 @@ def create_model_service(
         raise TypeError(f"{Cls.__name__} 必须继承自 BasicModel")
       # 保存当前操作的模型类
       self.Cls = Cls
+      # 模型元数据（字段、列、类型、索引等），请求处理过程中直接查表使用
+      self.meta = get_model_meta(Cls)
+      # 允许排序的字段：有索引的列 + 显式允许的字段；allow_unindexed_sort为True时允许按任意列排序
+      # 保存在服务实例上，同一个模型的多个服务可以使用不同的设置，不修改共享的模型元数据
+      if allow_unindexed_sort:
+        self.sortable_fields = frozenset(self.meta.columns.keys())
+      else:
+        self.sortable_fields = self.meta.indexed_columns | frozenset(sortable_fields)
+      # 单条查询缓存，可通过 item_cache.stats() 查看命中情况
+      self.item_cache = item_cache
+      # 分页查询结果缓存，可通过 list_cache.stats() 查看命中情况
+      self.list_cache = list_cache
+
+      # 表中是否存在由数据库生成值的字段（服务端默认值、ON UPDATE、计算列），存在时插入后需要回查才能拿到完整数据
+      self.has_server_generated_columns = any(
+        column.server_default is not None or column.server_onupdate is not None or column.computed is not None
+        for column in Cls.__table__.columns
+      )
+      # 基于模型字段创建一个非table的校验模型，并预先编译列表校验器，批量插入/upsert时避免逐条model_validate创建ORM实例
+      InsertPayload = create_model(
+        f"{Cls.__name__}InsertPayload",
+        __base__=BasicModel,
+        **{key: (field.annotation, field) for key, field in Cls.model_fields.items() if key not in BasicModel.model_fields}
+      )
+      self.insert_list_adapter = TypeAdapter(List[InsertPayload])
+      # 筛选条件编译器，字段名和类型在这里针对模型校验一次
+      self.filter_compiler = FilterCompiler(self.meta)
+      # 按id批量加载记录的合并器：并发的单个id查询在很短的时间窗口内合并为一条 WHERE id IN (...) 查询
+      # 其他控制器中可以直接使用，例如 await LlmProductService.loader.load(prod_id)
+      self.loader = BatchLoader(self.load_by_ids, max_batch_size=BATCH_CHUNK_SIZE)
+      # 预先编译的响应序列化器，接口直接序列化模型实例并使用orjson输出，跳过response_model校验和jsonable_encoder
+      self.list_serializer, self.item_serializer, self.batch_serializer, self.lookup_serializer = build_model_serializers(Cls)
+      # 查询指定字段的语句缓存：字段组合 -> 查询语句
+      self.select_cache = OrderedDict()
+      # 字典行的序列化器缓存：字段组合 -> (列表响应序列化器, 单条响应序列化器, 按id批量查询响应序列化器)
+      self.row_serializer_cache = OrderedDict()
+      # 包含关系属性的序列化器缓存：关系属性组合 -> (列表响应序列化器, 单条响应序列化器)
+      self.include_serializer_cache = OrderedDict()
+      if read_mode not in ('orm', 'core'):
+        raise ValueError(f"read_mode must be 'orm' or 'core', got {read_mode}")
+      # core模式下查询全部列，预先创建全部列的序列化器
+      self.column_names = list(self.meta.columns.keys())
+      if read_mode == 'core':
+        self.row_serializers(self.column_names)
 
     # 检查字典中的键是否为模型类的有效属性
     # 参数:
     #   row_dict: 待检查的字典（通常为请求参数）
     def check_invalid_keys(self, row_dict: dict):
       # 筛选出所有不在模型类属性中的键（无效键）
-      invalid_keys = [key for key in row_dict.keys() if not hasattr(Cls, key)]
+      invalid_keys = [key for key in row_dict.keys() if key not in self.meta.attribute_names]
       if invalid_keys:
         # 若存在无效键，抛出HTTP 500异常，提示无效键和有效键列表
         raise HTTPException(
@@ -70,43 +221,122 @@ def create_model_service(
       # 确定启用的端点，默认为全部支持的端点
       if not end_points:
         end_points = self.END_POINTS
+        # 主键之外有唯一约束的表不支持upsert，默认不注册upsert相关端点
+        if self.meta.unique_columns:
+          end_points = [end_point for end_point in end_points if end_point not in ('upsert', 'batch_upsert')]
 
+      # 以下响应模型只用于生成接口文档，接口返回时使用预先编译的序列化器输出，不再按响应模型校验
+      # 查询接口返回的记录模型，模型有关系属性时包含可选的关系属性
+      QueryItem = self.query_item_model()
       # 动态创建分页查询的响应模型：包含数据列表和是否有下一页的标识
-      ListResponse = create_model(f"{Cls.__name__}ListResponse", list=(List[Cls], ...), has_next=(bool, ...), total=(Union[int, None], None))
+      ListResponse = create_model(f"{Cls.__name__}ListResponse", list=(List[QueryItem], ...), has_next=(bool, ...), total=(Union[int, None], None), next_cursor=(Union[str, None], None))
       # 动态创建单条查询的响应模型：包含单个模型实例
-      ItemResponse = create_model(f"{Cls.__name__}ItemResponse", result=(Cls, ...))
+      ItemResponse = create_model(f"{Cls.__name__}ItemResponse", result=(QueryItem, ...))
+      # 动态创建按id批量查询的响应模型：按传入顺序的记录列表，不存在的id对应null
+      LookupResponse = create_model(f"{Cls.__name__}LookupResponse", result=(List[Optional[QueryItem]], ...))
       # 动态创建批量操作的响应模型：包含操作后的模型实例列表
       BatchResponse = create_model(f"{Cls.__name__}BatchResponse", result=(List[Cls], ...))
       # 动态创建批量删除的响应模型：包含删除操作是否成功的标识
       DeleteResponse = create_model(f"{Cls.__name__}BatchResponse", result=(bool, ...))
+      # 动态创建聚合查询的响应模型：每个分组一行，包含分组字段和聚合结果
+      AggregateResponse = create_model(f"{Cls.__name__}AggregateResponse", result=(List[dict], ...))
+
+      # 查询接口（list/item/aggregate）注入的会话：配置了只读副本时使用副本，否则与写接口一样使用主库
+      # 接口开启了缓存时，未命中缓存的查询结果会回填到所有进程共享的缓存中，副本的复制延迟会让旧数据在缓存中保留到过期，
+      # 因此这些接口始终使用主库（会话在第一次执行SQL时才获取连接，命中缓存时不占用主库连接）
+      def read_session_dep(cache) -> Any:
+        async def get_read_session() -> AsyncSession:
+          async with (async_session() if cache is not None else self.read_session()) as session:
+            yield session
+
+        return Annotated[AsyncSession, Depends(get_read_session)]
 
       # 创建APIRouter实例，设置路由前缀和标签（标签用于API文档分组）
-      router = APIRouter(prefix=path, tags=[path])
+      router = APIRouter(prefix=path, tags=[path], default_response_class=FastJSONResponse)
 
       # 若启用"list"端点，注册列表查询接口
       if 'list' in end_points:
         # 列表查询接口：支持过滤和分页，响应模型为ListResponse
         @router.post("/list", response_model=ListResponse)
-        async def _list(query_param: PageQueryParams, session: AsyncSessionDep):
+        async def _list(query_param: PageQueryParams, session: read_session_dep(list_cache)):
+          # 开启了分页结果缓存时，命中缓存直接返回已序列化好的JSON
+          cache_key = await list_cache.make_key(Cls.__tablename__, query_param.model_dump()) if list_cache is not None else None
+          if cache_key is not None:
+            content = await list_cache.get(cache_key)
+            if content is not None:
+              return Response(content=content, media_type="application/json")
+
           # 调用query_list方法执行查询，获取数据列表和是否有下一页
-          query_cls_list, has_next, total = await self.query_list(query_param, session)
+          query_cls_list, has_next, total, next_cursor = await self.query_list(query_param, session)
           # 返回符合响应模型的结果
-          return {
+          result = {
             "list": query_cls_list,
             "has_next": has_next,
             "total": total,
+            "next_cursor": next_cursor,
           }
+          read_fields = self.read_fields(query_param.fields, query_param.include)
+          if query_param.include:
+            # 指定了include时，将实例连同加载的关系属性转换为字典后序列化
+            serializer = self.include_serializers(query_param.include)[0]
+            result["list"] = [self.include_row(item_cls, query_param.include) for item_cls in query_cls_list]
+          elif read_fields:
+            # 查询结果为字典行时（指定了fields或core模式）使用字典行的序列化器
+            serializer = self.row_serializers(self.projection_fields(read_fields, query_param.sort_field))[0]
+          else:
+            serializer = self.list_serializer
+          response = self.json_response(serializer, result)
+          if cache_key is not None:
+            # 序列化后写入缓存
+            await list_cache.set(cache_key, response.body)
+          return response
 
       # 若启用"item"端点，注册单条查询接口
       if 'item' in end_points:
         # 单条查询接口：根据条件查询单条记录，响应模型为ItemResponse
         @router.post("/item", response_model=ItemResponse)
         async def _item(
-          session: AsyncSessionDep,
-          row_dict: dict = Body(..., description=f"插入的数据，字段参考{Cls.__name__}")
+          session: read_session_dep(item_cache),
+          row_dict: dict = Body(..., description=f"插入的数据，字段参考{Cls.__name__}"),
+          fields: List[str] = Query(default=None, description="只查询返回的字段列表，不传时返回全部字段"),
+          include: List[str] = Query(default=None, description="同时查询返回的关系属性列表，不能与fields同时使用"),
         ):
           # 调用query_item方法查询单条记录并返回
-          return {"result": await self.query_item(session, row_dict)}
+          item_cls = await self.query_item(session, row_dict, fields, include)
+          if include:
+            # 指定了include时，将实例连同加载的关系属性转换为字典后序列化
+            return self.json_response(self.include_serializers(include)[1], {"result": self.include_row(item_cls, include)})
+          read_fields = self.read_fields(fields)
+          # 查询结果为字典时（指定了fields或core模式）使用字典行的序列化器，否则使用模型的单条序列化器
+          serializer = self.row_serializers(self.projection_fields(read_fields))[1] if read_fields else self.item_serializer
+          return self.json_response(serializer, {"result": item_cls})
+
+      # 若启用"items_by_ids"端点，注册按id批量查询接口
+      if 'items_by_ids' in end_points:
+        # 按id批量查询接口：按传入的id顺序返回记录，不存在的id对应null，并发请求中的id会合并查询
+        @router.post("/items_by_ids", response_model=LookupResponse)
+        async def _items_by_ids(id_list: List[str] = Body(..., description="查询的id数组")):
+          read_fields = self.read_fields(None)
+          # core模式下查询结果为字典行，使用字典行的序列化器，否则使用模型的序列化器
+          serializer = self.row_serializers(self.projection_fields(read_fields))[2] if read_fields else self.lookup_serializer
+          return self.json_response(serializer, {"result": await self.loader.load_many(id_list)})
+
+      # 若启用"aggregate"端点，注册聚合查询接口
+      if 'aggregate' in end_points:
+        # 聚合查询接口：按分组字段执行 count/sum/avg/min/max，筛选条件与分页查询相同，在数据库中完成聚合
+        @router.post("/aggregate", response_model=AggregateResponse)
+        async def _aggregate(query_param: AggregateQueryParams, session: read_session_dep(aggregate_cache)):
+          # 开启了聚合结果缓存时，命中缓存直接返回已序列化好的JSON
+          cache_key = await aggregate_cache.make_key(Cls.__tablename__, query_param.model_dump()) if aggregate_cache is not None else None
+          if cache_key is not None:
+            content = await aggregate_cache.get(cache_key)
+            if content is not None:
+              return Response(content=content, media_type="application/json")
+
+          response = FastJSONResponse({"result": await self.query_aggregate(query_param, session)})
+          if cache_key is not None:
+            await aggregate_cache.set(cache_key, response.body)
+          return response
 
       # 若启用"insert"端点，注册单条插入接口
       if 'insert' in end_points:
@@ -117,7 +347,7 @@ def create_model_service(
           row_dict: dict = Body(..., description=f"插入的数据，字段参考{Cls.__name__}")
         ):
           # 调用item_insert方法执行插入并返回结果
-          return {"result": await self.item_insert(session, row_dict)}
+          return self.json_response(self.item_serializer, {"result": await self.item_insert(session, row_dict)})
 
       # 若启用"batch_insert"端点，注册批量插入接口
       if 'batch_insert' in end_points:
@@ -128,7 +358,7 @@ def create_model_service(
           row_dict_list: List[dict] = Body(..., description=f"批量插入的数据数组，字段参考{Cls.__name__}")
         ):
           # 调用batch_insert方法执行批量插入并返回结果
-          return {"result": await self.batch_insert(session, row_dict_list)}
+          return self.json_response(self.batch_serializer, {"result": await self.batch_insert(session, row_dict_list)})
 
       # 若启用"update"端点，注册单条更新接口
       if 'update' in end_points:
@@ -139,7 +369,7 @@ def create_model_service(
           row_dict: dict = Body(..., description=f"更新的数据，字段参考{Cls.__name__}")
         ):
           # 调用item_update方法执行更新并返回结果
-          return {"result": await self.item_update(session, row_dict)}
+          return self.json_response(self.item_serializer, {"result": await self.item_update(session, row_dict)})
 
       # 若启用"batch_update"端点，注册批量更新接口
       if 'batch_update' in end_points:
@@ -150,7 +380,7 @@ def create_model_service(
           row_dict_list: List[dict] = Body(..., description=f"批量更新的数据数组，字段参考{Cls.__name__}")
         ):
           # 调用batch_update方法执行批量更新并返回结果
-          return {"result": await self.batch_update(session, row_dict_list)}
+          return self.json_response(self.batch_serializer, {"result": await self.batch_update(session, row_dict_list)})
 
       # 若启用"delete"端点，注册单条删除接口
       if 'delete' in end_points:
@@ -161,7 +391,7 @@ def create_model_service(
           row_dict: dict = Body(..., description=f"删除的数据，字段参考{Cls.__name__}")
         ):
           # 调用item_delete方法执行删除并返回结果
-          return {"result": await self.item_delete(session, row_dict)}
+          return FastJSONResponse({"result": await self.item_delete(session, row_dict)})
 
       # 若启用"batch_delete"端点，注册批量删除接口
       if 'batch_delete' in end_points:
@@ -172,91 +402,516 @@ def create_model_service(
           row_dict_list: List[dict] = Body(..., description=f"批量删除的数据数组，字段参考{Cls.__name__}")
         ):
           # 调用batch_delete方法执行批量删除并返回结果
-          return {"result": await self.batch_delete(session, row_dict_list)}
+          return FastJSONResponse({"result": await self.batch_delete(session, row_dict_list)})
+
+      # 若启用"upsert"端点，注册单条新建或更新接口
+      if 'upsert' in end_points:
+        # 单条新建或更新接口：id已存在则更新传入的字段，否则新增，响应模型为ItemResponse
+        @router.post("/upsert", response_model=ItemResponse)
+        async def _upsert(
+          session: AsyncSessionDep,
+          row_dict: dict = Body(..., description=f"新建或更新的数据，字段参考{Cls.__name__}")
+        ):
+          # 调用batch_upsert方法执行新建或更新并返回结果
+          return self.json_response(self.item_serializer, {"result": (await self.batch_upsert(session, [row_dict]))[0]})
+
+      # 若启用"batch_upsert"端点，注册批量新建或更新接口
+      if 'batch_upsert' in end_points:
+        # 批量新建或更新接口：按批次执行 INSERT ... ON DUPLICATE KEY UPDATE，响应模型为BatchResponse
+        @router.post("/batch_upsert", response_model=BatchResponse)
+        async def _batch_upsert(
+          session: AsyncSessionDep,
+          row_dict_list: List[dict] = Body(..., description=f"批量新建或更新的数据数组，字段参考{Cls.__name__}")
+        ):
+          # 调用batch_upsert方法执行批量新建或更新并返回结果
+          return self.json_response(self.batch_serializer, {"result": await self.batch_upsert(session, row_dict_list)})
+
+      # 若启用"export"端点，注册流式导出接口
+      if 'export' in end_points:
+        # 流式导出接口：按筛选条件和排序导出全部数据，使用服务端游标分批读取，内存占用不随数据量增长
+        @router.post("/export")
+        async def _export(query_param: PageQueryParams, format: Literal['ndjson', 'csv'] = 'ndjson'):
+          # 在开始流式响应之前构建查询，筛选参数不合法时可以正常返回错误
+          export_query, filter_params = self.build_export_query(query_param)
+          return StreamingResponse(
+            self.export_rows(export_query, filter_params, format),
+            media_type="text/csv" if format == 'csv' else "application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="{Cls.__tablename__}.{format}"'},
+          )
+
+      # 若启用"import"端点，注册流式导入接口
+      if 'import' in end_points:
+        # 流式导入接口：请求体为gzip压缩（或未压缩）的NDJSON，边读取边解析，每commit_size条校验并提交一次
+        @router.post("/import")
+        async def _import(request: Request, session: AsyncSessionDep, commit_size: int = IMPORT_CHUNK_SIZE):
+          return await self.import_rows(session, iter_ndjson_lines(request), commit_size)
 
       # 将路由添加到FastAPI应用
       app.include_router(router)
 
+    # 使用预先编译的序列化器将返回结果转换为字典，再由orjson输出JSON
+    @staticmethod
+    def json_response(serializer: TypeAdapter, result: dict) -> FastJSONResponse:
+      # warnings=False：批量新建的高性能模式返回的是校验模型而不是表模型实例，按实际类型序列化即可
+      return FastJSONResponse(serializer.dump_python(result, warnings=False))
+
+    # 执行写操作的after钩子：使用deferred_hook标记的钩子提交到后台工作池，在请求之外执行，否则直接执行
+    @staticmethod
+    async def run_after_hook(hook, *args):
+      if getattr(hook, 'deferred', False):
+        # 最后一个参数为接口的会话，延迟执行时由工作池创建新的会话
+        await hook_worker_pool.submit(hook, *args[:-1])
+      else:
+        await hook(*args)
+
     # 分页查询工具方法：执行带过滤和分页的查询
     async def query_list(self, query_param: PageQueryParams, session: AsyncSessionDep):
 
       if before_query_list is not None:
         await before_query_list(query_param, session)
 
-      # 创建基础查询：查询当前模型类的所有记录
-      query = select(Cls)
-      count_query = select(func.count()).select_from(Cls)
-
-      # 若有过滤条件，验证并应用过滤
-      if query_param.filters:
-        self.check_invalid_keys(query_param.filters)
-        # 为每个过滤条件添加WHERE子句（字段=值）
-        for key, value in query_param.filters.items():
-          query = query.where(getattr(Cls, key) == value)
-          count_query = count_query.where(getattr(Cls, key) == value)
-
-      if query_param.sort_field:
-        # 为排序字段添加ORDER BY子句
-        cls_attr = getattr(Cls, query_param.sort_field)
-        order_value = cls_attr.desc() if query_param.sort_desc == 'desc' else cls_attr.asc();
-        query = query.order_by(order_value)
+      # 需要批量加载的关系属性
+      include_options = self.include_options(query_param.include, query_param.fields)
+      # 查询的字段，为空时查询模型实例，否则查询字典行
+      read_fields = self.read_fields(query_param.fields, query_param.include)
+      # 创建基础查询：查询当前模型类的所有记录（指定了fields时只查询这些字段），并应用过滤条件和排序
+      query, filter_params = self.apply_filters(self.select_fields(read_fields, query_param.sort_field), query_param.filters)
+      if include_options:
+        query = query.options(*include_options)
+      count_query, _ = self.apply_filters(select(func.count()).select_from(Cls), query_param.filters)
+      query, sort_attr, is_desc = self.apply_sort(query, query_param)
+
+      # 游标分页：从上一页最后一条记录的(sort_field, id)之后开始查询，走索引范围扫描而不是OFFSET跳过前N条
+      if query_param.cursor and query_param.all is False:
+        query = query.where(self.cursor_condition(query_param.cursor, sort_attr, is_desc))
 
       # 若不查询全部数据（即启用分页）
       if query_param.all is False:
-        # 计算偏移量（跳过前N条），并查询比一页多1条的记录（用于判断是否有下一页）
-        query = query.offset(query_param.page * query_param.page_size).limit(query_param.page_size + 1)
+        # 游标分页不需要偏移量；否则计算偏移量（跳过前N条），并查询比一页多1条的记录（用于判断是否有下一页）
+        offset = 0 if query_param.cursor else query_param.page * query_param.page_size
+        query = query.offset(offset).limit(query_param.page_size + 1)
 
       # 执行查询并获取结果
-      result = await session.execute(query)
+      result = await session.execute(query, filter_params)
 
       if query_param.count:
-        total, = (await session.execute(count_query)).one()
+        total = await self.query_total(query_param, count_query, filter_params, session)
       else:
         total = None
 
-      # 将查询结果转换为标量列表（模型实例列表）
-      query_cls_list: List[Any] = result.scalars().all()
-
-      # 打印查询结果类型和内容（调试用）
-      print("query_cls_list", type(query_cls_list), query_cls_list)
+      # 将查询结果转换为标量列表（模型实例列表），指定了fields或core模式时为字典列表
+      query_cls_list: List[Any] = self.row_dicts(result) if read_fields else result.scalars().all()
 
       # 判断是否有下一页：若查询结果数量等于一页大小+1，则说明有下一页
-      has_next = len(query_cls_list) == query_param.page_size + 1
+      has_next = query_param.all is False and len(query_cls_list) == query_param.page_size + 1
 
       # 若有下一页，移除多查询的那一条记录
       if has_next:
         query_cls_list.pop()
 
+      # 有下一页时，用当前页最后一条记录生成下一页的游标
+      next_cursor = None
+      if has_next and query_cls_list:
+        last_row = query_cls_list[-1] if read_fields else query_cls_list[-1].model_dump()
+        sort_value = last_row[query_param.sort_field] if sort_attr is not None else None
+        next_cursor = encode_cursor(sort_value, last_row['id'])
+
       if after_query_list is not None:
         await after_query_list(query_cls_list, has_next, query_param, session)
 
-      # 返回处理后的结果列表和是否有下一页的标识
-      return query_cls_list, has_next, total
+      # 返回处理后的结果列表、是否有下一页的标识、总数以及下一页游标
+      return query_cls_list, has_next, total, next_cursor
+
+    # 实际查询的字段：指定了fields时为这些字段，core模式下未指定时为全部列，orm模式下未指定时为None（查询模型实例）
+    # 指定了include时需要加载关系属性，始终查询模型实例
+    def read_fields(self, fields: List[str] | None, include: List[str] | None = None) -> List[str] | None:
+      if fields:
+        return fields
+      if include:
+        return None
+      return self.column_names if read_mode == 'core' else None
+
+    # 校验include中的关系属性，返回对应的selectinload选项：每个关系属性额外执行一条 WHERE ... IN (...) 查询，避免N+1懒加载
+    def include_options(self, include: List[str] | None, fields: List[str] | None = None) -> list:
+      if not include:
+        return []
+      if fields:
+        raise HTTPException(status_code=500, detail="include can not be used together with fields")
+      invalid_include = [name for name in include if name not in self.meta.relationship_names]
+      if invalid_include:
+        raise HTTPException(
+          status_code=500,
+          detail=f"Invalid include: {invalid_include}. Valid relationships are: {sorted(self.meta.relationship_names)}"
+        )
+      return [selectinload(getattr(Cls, name)) for name in include]
+
+    # 根据关系属性组合获取包含关系属性的序列化器，返回 (列表响应序列化器, 单条响应序列化器)，按组合缓存
+    def include_serializers(self, include: List[str]):
+      # 去重排序后作为key，顺序不同或重复的include共用同一组序列化器
+      cache_key = tuple(sorted(set(include)))
+
+      def build():
+        # 关系属性的目标模型在映射配置完成后才能确定，第一次使用时再读取
+        relationships = sa_inspect(Cls).relationships
+        field_types = {key: self.meta.field_types[key] for key in self.column_names}
+        for name in cache_key:
+          target = relationships[name].mapper.class_
+          field_types[name] = List[target] if relationships[name].uselist else target
+        return build_row_serializers(f"{Cls.__name__}Include{''.join(name.title() for name in cache_key)}", field_types)
+
+      return lru_get(self.include_serializer_cache, cache_key, build)
+
+    # 接口文档中查询接口返回的记录模型：模型没有关系属性时为模型本身，否则在字段之外增加可选的关系属性（指定include时返回）
+    def query_item_model(self):
+      if not self.meta.relationship_names:
+        return Cls
+      relationships = sa_inspect(Cls).relationships
+      return create_model(
+        f"{Cls.__name__}WithRelations",
+        **{key: (Optional[self.meta.field_types[key]], None) for key in self.column_names},
+        **{
+          name: (Optional[List[relationship.mapper.class_]] if relationship.uselist else Optional[relationship.mapper.class_], None)
+          for name, relationship in relationships.items()
+        },
+      )
+
+    # 将模型实例连同已加载的关系属性转换为字典
+    def include_row(self, item_cls, include: List[str]) -> dict | None:
+      if item_cls is None:
+        return None
+      row = {key: getattr(item_cls, key) for key in self.column_names}
+      for name in include:
+        row[name] = getattr(item_cls, name)
+      return row
+
+    # 将查询结果的行转换为字典列表，列名只取一次
+    @staticmethod
+    def row_dicts(result) -> List[dict]:
+      keys = list(result.keys())
+      return [dict(zip(keys, row)) for row in result.all()]
+
+    # 聚合查询工具方法：校验分组字段和聚合函数，编译为一条 GROUP BY 查询，返回每个分组的字典列表
+    async def query_aggregate(self, query_param: AggregateQueryParams, session: AsyncSessionDep) -> List[dict]:
+      invalid_fields = [field for field in query_param.group_by if field not in self.meta.columns]
+      if invalid_fields:
+        raise HTTPException(
+          status_code=500,
+          detail=f"Invalid group by fields: {invalid_fields}. Valid fields are: {list(self.meta.columns.keys())}"
+        )
+      if not query_param.aggregates:
+        raise HTTPException(status_code=500, detail="Aggregates can not be empty")
+
+      group_columns = [self.meta.columns[field] for field in query_param.group_by]
+      aggregate_columns = []
+      for item in query_param.aggregates:
+        if item.field is None:
+          if item.func != 'count':
+            raise HTTPException(status_code=500, detail=f"Aggregate function {item.func} requires a field")
+          expression = func.count()
+        else:
+          if item.field not in self.meta.columns:
+            raise HTTPException(
+              status_code=500,
+              detail=f"Invalid aggregate field: {item.field}. Valid fields are: {list(self.meta.columns.keys())}"
+            )
+          if item.func in NUMERIC_AGGREGATE_FUNCTIONS and self.meta.column_python_types.get(item.field) not in (int, float, Decimal):
+            raise HTTPException(status_code=500, detail=f"Aggregate function {item.func} requires a numeric field, {item.field} is not")
+          expression = AGGREGATE_FUNCTIONS[item.func](self.meta.columns[item.field])
+        aggregate_columns.append(expression.label(item.alias or (f"{item.func}_{item.field}" if item.field else item.func)))
+
+      labels = [*query_param.group_by, *[column.name for column in aggregate_columns]]
+      if len(set(labels)) != len(labels):
+        raise HTTPException(status_code=500, detail=f"Duplicate result fields: {labels}")
+
+      query, filter_params = self.apply_filters(select(*group_columns, *aggregate_columns).select_from(Cls), query_param.filters)
+      if group_columns:
+        query = query.group_by(*group_columns).order_by(*group_columns)
+      if query_param.limit is not None:
+        query = query.limit(query_param.limit)
+      return self.row_dicts(await session.execute(query, filter_params))
+
+    # 创建查询语句：未指定fields时查询完整的模型实例，否则只查询指定的字段（id和extra_fields始终查询）
+    def select_fields(self, fields: List[str] | None, *extra_fields: str):
+      if not fields:
+        return select(Cls)
+      # 查询语句按字段组合缓存，直接查询表的列，结果为普通的行而不是ORM实例
+      projection = tuple(self.projection_fields(fields, *extra_fields))
+      return lru_get(self.select_cache, projection, lambda: select(*[Cls.__table__.c[field] for field in projection]))
+
+    # 计算实际查询的字段列表：id + 请求的字段 + 额外字段（如排序字段，游标分页需要），去重后按表中列的顺序排列
+    # 字段相同而顺序不同的请求得到相同的字段列表，共用缓存的查询语句和序列化器
+    def projection_fields(self, fields: List[str], *extra_fields: str) -> List[str]:
+      field_set = {'id', *fields, *[field for field in extra_fields if field]}
+      invalid_fields = [field for field in field_set if field not in self.meta.columns]
+      if invalid_fields:
+        raise HTTPException(
+          status_code=500,
+          detail=f"Invalid fields: {invalid_fields}. Valid fields are: {list(self.meta.columns.keys())}"
+        )
+      return [field for field in self.meta.columns if field in field_set]
+
+    # 根据查询的字段列表获取字典行的序列化器，返回 (列表响应序列化器, 单条响应序列化器, 按id批量查询响应序列化器)，按字段组合缓存
+    def row_serializers(self, projection: List[str]):
+      return lru_get(self.row_serializer_cache, tuple(projection), lambda: build_row_serializers(
+        Cls.__name__,
+        {field: self.meta.field_types[field] for field in projection},
+      ))
+
+    # 验证并应用过滤条件，返回 (带过滤条件的查询, 过滤条件的绑定参数)，执行查询时需要传入绑定参数
+    def apply_filters(self, query, filters: dict | None):
+      condition, params = self.filter_compiler.compile(filters)
+      if condition is not None:
+        query = query.where(condition)
+      return query, params
+
+    # 获取排序字段的列对象，只允许按有索引的字段（或create_model_service中显式允许的字段）排序，避免大表全表filesort
+    def sort_column(self, sort_field: str):
+      if sort_field not in self.meta.columns:
+        raise HTTPException(status_code=500, detail=f"Invalid sort field: {sort_field}. Valid fields are: {list(self.meta.columns.keys())}")
+      if sort_field not in self.sortable_fields:
+        raise HTTPException(status_code=500, detail=f"Sort field {sort_field} is not indexed. Sortable fields are: {sorted(self.sortable_fields)}")
+      return self.meta.columns[sort_field]
+
+    # 应用排序，返回 (排序后的查询, 排序字段的列对象, 是否倒序)
+    def apply_sort(self, query, query_param: PageQueryParams):
+      # 排序字段，未指定排序字段时只按id排序
+      sort_attr = self.sort_column(query_param.sort_field) if query_param.sort_field else None
+      is_desc = query_param.sort_desc == 'desc'
+
+      if sort_attr is not None:
+        # 为排序字段添加ORDER BY子句
+        query = query.order_by(sort_attr.desc() if is_desc else sort_attr.asc())
+      # 追加id作为第二排序字段，保证排序结果稳定，游标分页依赖(sort_field, id)的唯一顺序
+      query = query.order_by(Cls.id.desc() if is_desc else Cls.id.asc())
+      return query, sort_attr, is_desc
+
+    # 构建导出查询：与分页查询使用相同的过滤和排序，只查询表字段不创建ORM实例，返回 (查询, 过滤条件的绑定参数)
+    def build_export_query(self, query_param: PageQueryParams):
+      query, filter_params = self.apply_filters(select(Cls.__table__), query_param.filters)
+      query, _, _ = self.apply_sort(query, query_param)
+      return query.execution_options(yield_per=EXPORT_CHUNK_SIZE), filter_params
+
+    # 流式导出：使用独立会话通过服务端游标读取数据，每EXPORT_CHUNK_SIZE条输出一块NDJSON或CSV
+    # 不使用接口注入的session，因为依赖项可能在流式响应结束前就已经关闭
+    async def export_rows(self, export_query, filter_params: dict, format: str):
+      column_names = [column.name for column in Cls.__table__.columns]
+      async with self.read_session() as session:
+        result = await session.stream(export_query, filter_params)
+
+        if format == 'csv':
+          buffer = io.StringIO()
+          writer = csv.writer(buffer)
+          writer.writerow(column_names)
+          yield buffer.getvalue()
+
+        async for row_list in result.mappings().partitions(EXPORT_CHUNK_SIZE):
+          if format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows([[format_export_value(row[name]) for name in column_names] for row in row_list])
+            yield buffer.getvalue()
+          else:
+            # 与接口返回使用相同的orjson编码，日期时间格式一致，Decimal等类型也可以正常输出
+            yield b"".join(orjson_dumps(dict(row)) + b"\n" for row in row_list)
+
+    # 分批导入：每chunk_size行校验并提交一次，返回每个批次的导入结果和错误信息
+    # 某一行JSON解析或字段校验失败时跳过该行并记录错误；某个批次写入数据库失败时回滚该批次并继续后续批次
+    async def import_rows(self, session: AsyncSessionDep, line_iterator, chunk_size: int = IMPORT_CHUNK_SIZE):
+      chunk_list = []
+      total = 0
+      inserted = 0
+
+      async def flush(start_line: int, line_list: List[tuple[int, bytes]]):
+        nonlocal inserted
+        errors = []
+        row_dict_list = []
+        # 记录对象 -> 行号；钩子可能修改、删除或重新排列记录，校验错误按记录对象找回行号
+        row_2_line_number = {}
+        for line_number, line in line_list:
+          try:
+            row_dict = json.loads(line)
+            row_dict_list.append(row_dict)
+            row_2_line_number[id(row_dict)] = line_number
+          except ValueError as e:
+            errors.append({"line": line_number, "error": f"Invalid JSON: {e}"})
+
+        chunk_inserted = 0
+        try:
+          # 与batch_insert相同，先执行钩子并为没有id的记录生成id，再校验，钩子对记录的修改都会写入数据库
+          if row_dict_list:
+            if before_batch_insert is not None:
+              await before_batch_insert(row_dict_list, session)
+            await self.assign_missing_ids(row_dict_list)
+
+          # 先整体校验，存在校验失败的行时记录错误并剔除后重新校验
+          try:
+            payload_list = self.insert_list_adapter.validate_python(row_dict_list)
+          except ValidationError as e:
+            invalid_index_set = {error['loc'][0] for error in e.errors() if error['loc']}
+            for index in sorted(invalid_index_set):
+              line_number = row_2_line_number.get(id(row_dict_list[index]), start_line)
+              errors.append({"line": line_number, "error": str([error['msg'] for error in e.errors() if error['loc'] and error['loc'][0] == index])})
+            row_dict_list = [row_dict for index, row_dict in enumerate(row_dict_list) if index not in invalid_index_set]
+            payload_list = self.insert_list_adapter.validate_python(row_dict_list)
+
+          if payload_list:
+            await session.execute(insert(Cls.__table__), self.insert_list_adapter.dump_python(payload_list))
+            await session.commit()
+            chunk_inserted = len(payload_list)
+            if after_batch_insert is not None:
+              await self.run_after_hook(after_batch_insert, payload_list, row_dict_list, session)
+        except Exception as e:
+          await session.rollback()
+          # 数据库异常只记录驱动层的原始错误，避免错误信息中带上整批的参数
+          errors.append({"line": start_line, "error": f"Chunk insert failed: {getattr(e, 'orig', None) or e}"})
+
+        inserted += chunk_inserted
+        chunk_list.append({"chunk": len(chunk_list) + 1, "start_line": start_line, "rows": len(line_list), "inserted": chunk_inserted, "errors": errors})
+        print(f"{Cls.__tablename__} import chunk {len(chunk_list)}: lines {start_line}-{start_line + len(line_list) - 1}, inserted {chunk_inserted}, errors {len(errors)}")
+
+      line_list = []
+      async for line in line_iterator:
+        total += 1
+        line_list.append((total, line))
+        if len(line_list) >= chunk_size:
+          await flush(line_list[0][0], line_list)
+          line_list = []
+      if line_list:
+        await flush(line_list[0][0], line_list)
+
+      if inserted:
+        # 表数据发生变化，使缓存失效
+        await self.invalidate_caches()
+
+      return {
+        "total": total,
+        "inserted": inserted,
+        "failed": total - inserted,
+        "chunks": chunk_list,
+      }
+
+    # 查询总数：优先读取总数缓存，count_mode=estimate且无筛选条件时读取表统计信息中的估算行数
+    async def query_total(self, query_param: PageQueryParams, count_query, filter_params: dict, session: AsyncSessionDep):
+      table_name = Cls.__tablename__
+
+      if query_param.count_mode == 'estimate' and not query_param.filters:
+        estimate_result = await session.execute(
+          text("select TABLE_ROWS from information_schema.TABLES where TABLE_SCHEMA = database() and TABLE_NAME = :table_name"),
+          {"table_name": table_name},
+        )
+        estimate_total = estimate_result.scalar()
+        if estimate_total is not None:
+          return int(estimate_total)
+
+      total = CountCache.get(table_name, query_param.filters)
+      if total is None:
+        total, = (await session.execute(count_query, filter_params)).one()
+        # 副本可能还没有同步最新的写入，从副本查询的总数不写入缓存
+        if not is_replica_session(session):
+          CountCache.set(table_name, query_param.filters, total)
+      return total
+
+    # 读操作使用的会话，按engine_router的规则选择主库或只读副本
+    def read_session(self) -> AsyncSession:
+      return read_session(Cls.__tablename__)
+
+    # 表数据发生写操作之后调用，使该表相关的缓存失效，该表短时间内的读操作改为使用主库
+    async def invalidate_caches(self):
+      engine_router.mark_written(Cls.__tablename__)
+      CountCache.invalidate(Cls.__tablename__)
+      if list_cache is not None:
+        await list_cache.bump_version(Cls.__tablename__)
+      if aggregate_cache is not None and aggregate_cache is not list_cache:
+        await aggregate_cache.bump_version(Cls.__tablename__)
+
+    # 单条缓存的key：表名:主键
+    def item_cache_key(self, id_value) -> str:
+      return f"{Cls.__tablename__}:{id_value}"
+
+    # 记录被更新或删除之后调用，使这些记录的单条缓存失效
+    async def invalidate_items(self, id_list: List[Any]):
+      if item_cache is not None:
+        await item_cache.delete([self.item_cache_key(id_value) for id_value in id_list])
+
+    # 根据游标生成范围查询条件：(sort_field, id) 严格位于游标之后
+    # 参数:
+    #   cursor: 上一页返回的next_cursor
+    #   sort_attr: 排序字段的列对象，为None时只按id排序
+    #   is_desc: 是否倒序
+    def cursor_condition(self, cursor: str, sort_attr, is_desc: bool):
+      python_type = self.meta.column_python_types.get(sort_attr.key) if sort_attr is not None else None
+      try:
+        sort_value, id_value = decode_cursor(cursor, python_type)
+      except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+      id_condition = Cls.id < id_value if is_desc else Cls.id > id_value
+      if sort_attr is None:
+        return id_condition
+      sort_condition = sort_attr < sort_value if is_desc else sort_attr > sort_value
+      # 展开为 sort > v OR (sort = v AND id > last_id)，MySQL可以对其使用索引范围扫描
+      return or_(sort_condition, and_(sort_attr == sort_value, id_condition))
 
     # 单条查询工具方法：根据条件查询单条记录
-    async def query_item(self, session: AsyncSessionDep, row_dict: dict = Body(..., description=f"查询数据的字段筛选值，字段参考{Cls.__name__}")):
+    async def query_item(self, session: AsyncSessionDep, row_dict: dict = Body(..., description=f"查询数据的字段筛选值，字段参考{Cls.__name__}"), fields: List[str] = None, include: List[str] = None):
       if before_query_item is not None:
         await before_query_item(row_dict, session)
 
-      # 创建基础查询：查询当前模型类的所有记录
-      query = select(Cls)
+      # 需要批量加载的关系属性
+      include_options = self.include_options(include, fields)
 
-      # 验证查询条件中的键是否有效
-      self.check_invalid_keys(row_dict)
-      # 为每个条件添加WHERE子句（字段=值）
-      for key, value in row_dict.items():
-        query = query.where(getattr(Cls, key) == value)
+      # 开启了单条缓存、只按单个id查询并且查询完整记录（不包含关系属性）时，优先读取缓存
+      is_id_lookup = row_dict.keys() == {'id'} and not isinstance(row_dict['id'], dict)
+      cache_key = self.item_cache_key(row_dict['id']) if item_cache is not None and is_id_lookup and not fields and not include else None
+      cache_value = await item_cache.get(cache_key) if cache_key is not None else None
+      # 未命中缓存时，在查询之前获取版本，查询期间记录被更新或删除时不回填旧数据
+      cache_version = await item_cache.version(cache_key) if cache_key is not None and cache_value is None else None
+
+      # 查询的字段，为空时查询模型实例，否则查询字典
+      read_fields = self.read_fields(fields, include)
 
-      # 执行查询
-      result = await session.execute(query)
-      # 返回第一条匹配的记录（若存在）
-      item_cls = result.scalars().first()
+      if cache_value is not None:
+        # core模式下直接返回缓存的字典，日期时间字段已经是格式化后的字符串
+        item_cls = cache_value if read_fields else Cls.model_validate(cache_value)
+      else:
+        # 创建基础查询：查询当前模型类的所有记录（指定了fields时只查询这些字段），查询条件与分页查询的filters规则相同
+        query, filter_params = self.apply_filters(self.select_fields(read_fields), row_dict)
+        if include_options:
+          query = query.options(*include_options)
+
+        # 执行查询
+        result = await session.execute(query, filter_params)
+        # 返回第一条匹配的记录（若存在），指定了fields或core模式时为字典
+        if read_fields:
+          row = result.mappings().first()
+          item_cls = dict(row) if row is not None else None
+        else:
+          item_cls = result.scalars().first()
+
+        # 查询到记录时回填缓存
+        if cache_key is not None and item_cls is not None:
+          if read_fields:
+            cache_value = self.row_serializers(self.projection_fields(read_fields))[1].dump_python({"result": item_cls}, mode='json')['result']
+          else:
+            cache_value = json.loads(item_cls.model_dump_json())
+          await item_cache.set(cache_key, cache_value, cache_version)
 
       if after_query_item is not None:
         await after_query_item(item_cls, row_dict, session)
 
       return item_cls
 
+    # 按id批量查询记录，返回 id -> 记录（core模式下为字典），供合并器调用
+    # 合并后的查询可能来自多个请求，因此使用独立会话，不使用某个接口注入的session
+    async def load_by_ids(self, id_list: List[Any]) -> dict:
+      read_fields = self.read_fields(None)
+      async with self.read_session() as session:
+        if read_fields:
+          result = await session.execute(self.select_fields(read_fields).where(Cls.id.in_(id_list)))
+          return {row['id']: row for row in self.row_dicts(result)}
+        result = await session.execute(select(Cls).where(Cls.id.in_(id_list)))
+        return {item_cls.id: item_cls for item_cls in result.scalars().all()}
+
     # 单条插入工具方法：新增一条记录
     async def item_insert(self, session: AsyncSessionDep, row_dict: dict = Body(..., description=f"插入的数据，字段参考{Cls.__name__}")):
       if before_insert is not None:
@@ -278,9 +933,11 @@ def create_model_service(
       await session.commit()
       # 刷新实例，获取数据库生成的最新数据（如自动更新的时间字段）
       await session.refresh(insert_cls)
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
 
       if after_insert is not None:
-        await after_insert(insert_cls, row_dict, session)
+        await self.run_after_hook(after_insert, insert_cls, row_dict, session)
 
       # 返回插入的实例
       return insert_cls
@@ -291,6 +948,38 @@ def create_model_service(
       if before_batch_insert is not None:
         await before_batch_insert(row_dict_list, session)
 
+      # 为没有id的记录自动生成id
+      await self.assign_missing_ids(row_dict_list)
+
+      if bulk_insert:
+        refresh_cls_list = await self.bulk_insert_rows(session, row_dict_list)
+      else:
+        try:
+          # 验证所有记录并转换为模型实例列表
+          insert_cls_list = [Cls.model_validate(row_dict) for row_dict in row_dict_list]
+        except ValueError as e:
+          # 验证失败时抛出异常
+          raise HTTPException(status_code=500, detail=str(e))
+
+        # 将所有实例添加到会话
+        session.add_all(insert_cls_list)
+
+        # 提交事务，保存数据到数据库
+        await session.commit()
+        # 表数据发生变化，使缓存失效
+        await self.invalidate_caches()
+
+        # 查询并返回所有插入的实例（刷新数据，确保获取最新状态）
+        refresh_cls_list = (await session.execute(select(Cls).where(Cls.id.in_([obj.id for obj in insert_cls_list])))).scalars().all()
+
+      if after_batch_insert is not None:
+        await self.run_after_hook(after_batch_insert, refresh_cls_list, row_dict_list, session)
+
+      # 返回刷新后的实例列表
+      return refresh_cls_list
+
+    # 为没有id的记录批量生成唯一id
+    async def assign_missing_ids(self, row_dict_list: List[dict]):
       # 筛选出没有id的记录（需要自动生成id）
       row_dict_list_without_id = []
 
@@ -302,34 +991,117 @@ def create_model_service(
       if len(row_dict_list_without_id):
         # 批量生成唯一id（数量等于需要生成id的记录数）
         new_id_list = await next_id(len(row_dict_list_without_id))
+        # next_id生成单个id时直接返回id字符串，统一转换为列表
+        if len(row_dict_list_without_id) == 1:
+          new_id_list = [new_id_list]
         # 为每条记录分配生成的id
         for index, id in enumerate(new_id_list):
           row_dict_list_without_id[index]["id"] = id
 
+    # 使用预编译的TypeAdapter校验待插入的数据，返回校验后的数据实例列表
+    def validate_insert_rows(self, row_dict_list: List[dict]):
       try:
-        # 验证所有记录并转换为模型实例列表
-        insert_cls_list = [Cls.model_validate(row_dict) for row_dict in row_dict_list]
-      except ValueError as e:
+        return self.insert_list_adapter.validate_python(row_dict_list)
+      except ValidationError as e:
         # 验证失败时抛出异常
         raise HTTPException(status_code=500, detail=str(e))
 
-      # 将所有实例添加到会话
-      session.add_all(insert_cls_list)
+    # 高性能批量插入：使用预编译的TypeAdapter校验数据，再按批次执行Core层的INSERT（executemany）
+    # 同一条预编译语句在驱动层被改写为多行 INSERT ... VALUES (...), (...)，避免为每个批次重新编译SQL
+    # 返回校验后的数据实例，只有表中存在服务端生成字段时才回查数据库
+    async def bulk_insert_rows(self, session: AsyncSessionDep, row_dict_list: List[dict]):
+      payload_list = self.validate_insert_rows(row_dict_list)
+      value_dict_list = self.insert_list_adapter.dump_python(payload_list)
+      for start in range(0, len(value_dict_list), BATCH_CHUNK_SIZE):
+        await session.execute(insert(Cls.__table__), value_dict_list[start:start + BATCH_CHUNK_SIZE])
 
       # 提交事务，保存数据到数据库
       await session.commit()
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
+
+      if not self.has_server_generated_columns:
+        return payload_list
+      # 存在服务端生成字段，查询并返回所有插入的实例
+      return (await session.execute(select(Cls).where(Cls.id.in_([payload.id for payload in payload_list])))).scalars().all()
+
+    # 批量新建或更新工具方法：按批次执行 INSERT ... ON DUPLICATE KEY UPDATE
+    # id已存在的记录只更新请求中传入的字段（以及updated_at），不存在的记录按模型默认值补全后新增
+    # 执行前按id是否已存在把记录分为新增和更新两组，分别触发批量新建和批量更新的前后钩子（单条upsert同样触发）
+    async def batch_upsert(self, session: AsyncSessionDep, row_dict_list: List[dict] = Body(..., description=f"批量新建或更新的数据数组，字段参考{Cls.__name__}")):
+      # ON DUPLICATE KEY UPDATE 在任意唯一键冲突时都会触发，主键之外还有唯一约束时，
+      # 新id的记录可能与另一条已存在记录的唯一列冲突，误更新那条记录，因此不支持
+      if self.meta.unique_columns:
+        raise HTTPException(
+          status_code=500,
+          detail=f"{Cls.__name__} has unique columns {sorted(self.meta.unique_columns)} besides id, upsert is not supported",
+        )
 
-      # 查询并返回所有插入的实例（刷新数据，确保获取最新状态）
-      refresh_cls_list = (await session.execute(select(Cls).where(Cls.id.in_([obj.id for obj in insert_cls_list])))).scalars().all()
+      if not row_dict_list:
+        return []
+
+      # 查询已存在的id；分组与执行之间其他请求新增的记录会被更新，但仍按新增触发钩子
+      given_id_list = [row_dict['id'] for row_dict in row_dict_list if row_dict.get('id') is not None]
+      exist_id_set = set()
+      for start in range(0, len(given_id_list), BATCH_CHUNK_SIZE):
+        chunk_id_list = given_id_list[start:start + BATCH_CHUNK_SIZE]
+        exist_id_set.update((await session.execute(select(Cls.id).where(Cls.id.in_(chunk_id_list)))).scalars().all())
+      insert_row_dicts = [row_dict for row_dict in row_dict_list if row_dict.get('id') not in exist_id_set]
+      update_row_dicts = [row_dict for row_dict in row_dict_list if row_dict.get('id') in exist_id_set]
+
+      if before_batch_insert is not None and insert_row_dicts:
+        await before_batch_insert(insert_row_dicts, session)
+      if before_batch_update is not None and update_row_dicts:
+        await before_batch_update(update_row_dicts, session)
 
-      if after_batch_insert is not None:
-        await after_batch_insert(refresh_cls_list, row_dict_list, session)
+      for row_dict in row_dict_list:
+        self.check_invalid_keys(row_dict)
+      # 为没有id的记录自动生成id，这些记录一定走新增
+      await self.assign_missing_ids(row_dict_list)
+
+      value_dict_list = self.insert_list_adapter.dump_python(self.validate_insert_rows(row_dict_list))
+
+      # 按照传入的字段集合对记录分组，同一组的ON DUPLICATE KEY UPDATE子句相同，可以合并为一条多行INSERT语句
+      column_group_2_value_dicts = {}
+      for row_dict, value_dict in zip(row_dict_list, value_dict_list):
+        columns = tuple(sorted({key for key in row_dict.keys() if key not in UPSERT_IGNORE_UPDATE_COLUMNS} | {'updated_at'}))
+        column_group_2_value_dicts.setdefault(columns, []).append(value_dict)
+
+      for columns, group_value_dicts in column_group_2_value_dicts.items():
+        for start in range(0, len(group_value_dicts), BATCH_CHUNK_SIZE):
+          upsert_query = mysql_insert(Cls.__table__).values(group_value_dicts[start:start + BATCH_CHUNK_SIZE])
+          upsert_query = upsert_query.on_duplicate_key_update({column: upsert_query.inserted[column] for column in columns})
+          await session.execute(upsert_query)
+
+      # 提交之前查询所有新建或更新后的实例，按传入顺序排列
+      id_list = [value_dict['id'] for value_dict in value_dict_list]
+      refresh_query = select(Cls).where(Cls.id.in_(id_list)).execution_options(populate_existing=True)
+      id_2_refresh_cls = {refresh_cls.id: refresh_cls for refresh_cls in (await session.execute(refresh_query)).scalars().all()}
+      missing_id_list = [id for id in dict.fromkeys(id_list) if id not in id_2_refresh_cls]
+      if missing_id_list:
+        # 记录没有按id写入（与其他唯一键冲突时更新了另一条记录），回滚整批
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Upsert rows not written by id: {missing_id_list}")
+      refresh_cls_list = [id_2_refresh_cls[id] for id in dict.fromkeys(id_list)]
+
+      # 提交事务
+      await session.commit()
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
+      await self.invalidate_items(id_list)
+
+      if after_batch_insert is not None and insert_row_dicts:
+        insert_id_set = {row_dict['id'] for row_dict in insert_row_dicts}
+        insert_cls_list = [refresh_cls for refresh_cls in refresh_cls_list if refresh_cls.id in insert_id_set]
+        await self.run_after_hook(after_batch_insert, insert_cls_list, insert_row_dicts, session)
+      if after_batch_update is not None and update_row_dicts:
+        update_cls_list = [refresh_cls for refresh_cls in refresh_cls_list if refresh_cls.id in exist_id_set]
+        await self.run_after_hook(after_batch_update, update_cls_list, update_row_dicts, session)
 
-      # 返回刷新后的实例列表
       return refresh_cls_list
 
     # 单条更新工具方法：更新一条记录
-    async def item_update(self, session: AsyncSessionDep, row_dict: dict = Body(..., description=f"更新的数据，字段参考{Cls.__name__}")):
+    async def item_update(self, session: AsyncSessionDep, row_dict: dict = Body(..., description=f"更新的数据，字段参考{Cls.__name__}"), direct: bool = None):
 
       if before_update is not None:
         await before_update(row_dict, session)
@@ -337,6 +1109,11 @@ def create_model_service(
       # 检查id是否存在（更新必须指定id）
       if not row_dict.get('id'):
         raise HTTPException(status_code=400, detail="ID不能为空")
+
+      # 直接模式：不查询记录，一次往返完成更新
+      if (direct_write if direct is None else direct):
+        return await self.direct_update(session, row_dict)
+
       # 根据id查询要更新的记录
       update_cls = (await session.exec(select(Cls).where(Cls.id == row_dict.get('id')))).first()
       if not update_cls:
@@ -353,59 +1130,115 @@ def create_model_service(
       await session.commit()
       # 刷新实例，获取最新数据
       await session.refresh(update_cls)
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
+      await self.invalidate_items([update_cls.id])
 
       if after_update is not None:
-        await after_update(update_cls, row_dict, session)
+        await self.run_after_hook(after_update, update_cls, row_dict, session)
 
       # 返回更新后的实例
       return update_cls
 
+    # 直接模式的单条更新：执行 UPDATE ... WHERE id = :id，按影响行数判断记录是否存在
+    # 返回传入的字段与updated_at合并后的字典（不包含未更新的字段），after_update标记了require_full_object时才回查完整记录
+    async def direct_update(self, session: AsyncSessionDep, row_dict: dict):
+      invalid_keys = [key for key in row_dict.keys() if key not in self.meta.columns]
+      if invalid_keys:
+        raise HTTPException(
+          status_code=500,
+          detail=f"Invalid update keys: {invalid_keys}. Valid keys are: {list(self.meta.columns.keys())}"
+        )
+
+      id_value = row_dict['id']
+      values = Cls.parse_string_datetimes({key: value for key, value in row_dict.items() if key != 'id'})
+      # 未指定更新时间时由服务端生成
+      if values.get('updated_at') is None:
+        values['updated_at'] = current_datetime()
+
+      update_query = update(Cls).where(Cls.id == id_value).values(values).execution_options(synchronize_session=False)
+      # MySQL方言连接时设置了CLIENT_FOUND_ROWS，rowcount为匹配的行数，值未发生变化的记录同样计数
+      if (await session.execute(update_query)).rowcount == 0:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail="Update row not found")
+      await session.commit()
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
+      await self.invalidate_items([id_value])
+
+      update_dict = {'id': id_value, **values}
+      if after_update is not None:
+        if getattr(after_update, 'require_full_object', False):
+          refresh_query = select(Cls).where(Cls.id == id_value).execution_options(populate_existing=True)
+          await self.run_after_hook(after_update, (await session.execute(refresh_query)).scalars().first(), row_dict, session)
+        else:
+          await self.run_after_hook(after_update, update_dict, row_dict, session)
+
+      return update_dict
+
     # 批量更新工具方法：批量更新记录
     async def batch_update(self, session: AsyncSessionDep, row_dict_list: List[dict] = Body(..., description=f"批量更新的数据数组，字段参考{Cls.__name__}")):
 
       if before_batch_update is not None:
         await before_batch_update(row_dict_list, session)
 
-      # 提取所有待更新记录的id
-      update_id_list = [row_dict['id'] for row_dict in row_dict_list]
-      # 根据id查询所有待更新的记录
-      update_cls_list = (await session.exec(select(Cls).where(Cls.id.in_(update_id_list)))).all()
-      # 若查询到的记录数量与待更新数量不一致，说明部分id不存在
-      if len(update_cls_list) != len(row_dict_list):
-        # 抛出异常并提示不存在的id
-        raise HTTPException(status_code=500, detail="Update row not found：" + json.dumps(row_dict_list, ensure_ascii=False))
-
-      # 创建id到更新数据的映射（便于快速查找）
+      # 创建id到更新数据的映射，同一id出现多次时以最后一次为准
       id_2_row_dict = {row_dict["id"]: row_dict for row_dict in row_dict_list}
-
-      # 遍历每条查询到的记录，更新其字段
-      for update_cls in update_cls_list:
-        # 获取当前记录对应的更新数据（根据id）
-        row_dict = id_2_row_dict.get(update_cls.id, None)
-        # 遍历更新字段
-        for key, value in row_dict.items():
-          setattr(update_cls, key, value)
-
-      # 将所有更新后的实例添加到会话
-      session.add_all(update_cls_list)
+      if not id_2_row_dict:
+        return []
+
+      # 按照更新的字段集合对记录分组，同一组可以合并为一条 UPDATE ... SET col = CASE id ... 语句
+      column_group_2_row_dicts = {}
+      for row_dict in id_2_row_dict.values():
+        self.check_invalid_keys(row_dict)
+        columns = tuple(sorted(key for key in row_dict.keys() if key != 'id'))
+        column_group_2_row_dicts.setdefault(columns, []).append(Cls.parse_string_datetimes(row_dict))
+
+      for columns, group_row_dicts in column_group_2_row_dicts.items():
+        # 只有id没有其他字段的记录不需要更新
+        if not columns:
+          continue
+        for start in range(0, len(group_row_dicts), BATCH_CHUNK_SIZE):
+          chunk_row_dicts = group_row_dicts[start:start + BATCH_CHUNK_SIZE]
+          chunk_id_list = [row_dict['id'] for row_dict in chunk_row_dicts]
+          values = {
+            column: case({row_dict['id']: row_dict[column] for row_dict in chunk_row_dicts}, value=Cls.id)
+            for column in columns
+          }
+          update_query = update(Cls).where(Cls.id.in_(chunk_id_list)).values(values).execution_options(synchronize_session=False)
+          await session.execute(update_query)
+
+      # 在同一事务内查询更新后的记录，populate_existing保证会话中已有的实例被数据库中的最新值覆盖
+      refresh_query = select(Cls).where(Cls.id.in_(list(id_2_row_dict.keys()))).execution_options(populate_existing=True)
+      refresh_cls_list = (await session.execute(refresh_query)).scalars().all()
+      # 若查询到的记录数量与待更新数量不一致，说明部分id不存在，回滚整个批量更新
+      if len(refresh_cls_list) != len(id_2_row_dict):
+        await session.rollback()
+        # 抛出异常并提示不存在的id
+        raise HTTPException(status_code=500, detail="Update row not found：" + json.dumps(row_dict_list, ensure_ascii=False, default=str))
 
       # 提交事务
       await session.commit()
-      # 查询并返回所有更新后的实例（刷新数据）
-      refresh_cls_list = (await session.execute(select(Cls).where(Cls.id.in_([obj.id for obj in update_cls_list])))).scalars().all()
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
+      await self.invalidate_items(list(id_2_row_dict.keys()))
 
       if after_batch_update is not None:
-        await after_batch_update(refresh_cls_list, row_dict_list, session)
+        await self.run_after_hook(after_batch_update, refresh_cls_list, row_dict_list, session)
 
       # 返回刷新后的实例列表
       return refresh_cls_list
 
     # 单条删除工具方法：删除一条记录
-    async def item_delete(self, session: AsyncSessionDep, row_dict: dict = Body(..., description=f"删除的数据，字段参考{Cls.__name__}")):
+    async def item_delete(self, session: AsyncSessionDep, row_dict: dict = Body(..., description=f"删除的数据，字段参考{Cls.__name__}"), direct: bool = None):
 
       if before_delete is not None:
         await before_delete(row_dict, session)
 
+      # 直接模式：不加载记录，一次往返完成删除
+      if (direct_write if direct is None else direct):
+        return await self.direct_delete(session, row_dict)
+
       # 根据id查询要删除的记录
       delete_cls = (await session.exec(select(Cls).where(Cls.id == row_dict.get('id')))).first()
       if not delete_cls:
@@ -416,13 +1249,43 @@ def create_model_service(
       await session.delete(delete_cls)
       # 提交事务，执行删除
       await session.commit()
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
+      await self.invalidate_items([delete_cls.id])
 
       if after_delete is not None:
-        await after_delete(delete_cls, row_dict, session)
+        await self.run_after_hook(after_delete, delete_cls, row_dict, session)
 
       # 返回删除成功
       return True
 
+    # 直接模式的单条删除：执行 DELETE ... WHERE id = :id，影响行数为0时返回删除失败
+    # after_delete标记了require_full_object时在同一事务内先查询出完整记录，否则钩子收到的是传入的字典
+    async def direct_delete(self, session: AsyncSessionDep, row_dict: dict):
+      id_value = row_dict.get('id')
+      if not id_value:
+        return False
+
+      delete_cls = row_dict
+      if after_delete is not None and getattr(after_delete, 'require_full_object', False):
+        delete_cls = (await session.execute(select(Cls).where(Cls.id == id_value))).scalars().first()
+        if delete_cls is None:
+          return False
+
+      delete_query = delete(Cls).where(Cls.id == id_value).execution_options(synchronize_session=False)
+      if (await session.execute(delete_query)).rowcount == 0:
+        await session.rollback()
+        return False
+      await session.commit()
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
+      await self.invalidate_items([id_value])
+
+      if after_delete is not None:
+        await self.run_after_hook(after_delete, delete_cls, row_dict, session)
+
+      return True
+
     # 批量删除工具方法：批量删除记录
     async def batch_delete(self, session: AsyncSessionDep, row_dict_list: List[dict] = Body(..., description=f"批量删除的数据数组，字段参考{Cls.__name__}")):
 
@@ -432,24 +1295,30 @@ def create_model_service(
       # 若待删除列表为空，返回失败
       if not row_dict_list:
         return False
-      # 提取所有待删除记录的id
-      row_id_list = [row_dict.get("id") for row_dict in row_dict_list]
-
-      # 根据id查询所有待删除的记录
-      delete_cls_list = (await session.exec(select(Cls).where(Cls.id.in_(row_id_list)))).all()
-      # 若查询到的记录数量与待删除数量不一致，说明部分id不存在
-      if len(delete_cls_list) != len(row_id_list):
+      # 提取所有待删除记录的id（去重）
+      row_id_list = list(dict.fromkeys(row_dict.get("id") for row_dict in row_dict_list))
+
+      # 按批次执行 DELETE ... WHERE id IN (...)，不再逐条加载实例走会话的unit of work
+      delete_count = 0
+      for start in range(0, len(row_id_list), BATCH_CHUNK_SIZE):
+        chunk_id_list = row_id_list[start:start + BATCH_CHUNK_SIZE]
+        delete_query = delete(Cls).where(Cls.id.in_(chunk_id_list)).execution_options(synchronize_session=False)
+        delete_count += (await session.execute(delete_query)).rowcount
+
+      # 若删除的记录数量与待删除数量不一致，说明部分id不存在，回滚整个批量删除
+      if delete_count != len(row_id_list):
+        await session.rollback()
         # 抛出异常并提示不存在的id
         raise HTTPException(status_code=500, detail="Delete row not found：" + json.dumps(row_id_list, ensure_ascii=False))
 
-      # 异步批量删除所有记录（使用gather并发执行删除操作）
-      await asyncio.gather(*[asyncio.create_task(session.delete(delete_cls)) for delete_cls in delete_cls_list])
-
       # 提交事务，执行删除
       await session.commit()
+      # 表数据发生变化，使缓存失效
+      await self.invalidate_caches()
+      await self.invalidate_items(row_id_list)
 
       if after_batch_delete is not None:
-        await after_batch_delete(delete_cls_list, row_dict_list, session)
+        await self.run_after_hook(after_batch_delete, row_id_list, row_dict_list, session)
 
       # 返回删除成功
       return True
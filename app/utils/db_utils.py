@@ -1,4 +1,7 @@
-from typing import Annotated
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Annotated, List
 from fastapi.params import Depends
 from sqlalchemy import AsyncAdaptedQueuePool, text
 from sqlalchemy.ext.asyncio import AsyncEngine
@@ -6,23 +9,85 @@ from sqlalchemy.orm import sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config.env import env
+from app.utils.query_stats import instrument_engine
+from app.utils.slow_query_log import slow_query_log
 from sqlmodel import create_engine
 # from sqlalchemy.ext.asyncio import create_async_engine
 
 DATABASE_URL = f"mysql+asyncmy://{env.db_username}:{env.db_password}@{env.db_host}:{env.db_port}/{env.db_database}?charset=utf8mb4"
 
-# 创建异步引擎实例，用于异步操作数据库
-async_engine = AsyncEngine(create_engine(
-  DATABASE_URL,
-  poolclass=AsyncAdaptedQueuePool,  # 使用异步适配的队列池
-  pool_size=10,  # 连接池保持的连接数
-  max_overflow=20,  # 允许超过pool_size的最大连接数
-  pool_timeout=60,  # 获取连接的超时时间(秒)
-  pool_recycle=300,  # 连接回收时间(秒)
-  pool_pre_ping=True,  # 预检查连接是否可用，防止连接断开
-  echo=True,  # 启用SQL语句日志输出，便于开发调试
-  future=True,  # 启用SQLAlchemy 2.0风格的未来模式API
-))
+# 创建异步引擎实例，主库和只读副本使用相同的连接池配置
+def new_async_engine(url: str) -> AsyncEngine:
+  engine = AsyncEngine(create_engine(
+    url,
+    poolclass=AsyncAdaptedQueuePool,  # 使用异步适配的队列池
+    pool_size=10,  # 连接池保持的连接数
+    max_overflow=20,  # 允许超过pool_size的最大连接数
+    pool_timeout=60,  # 获取连接的超时时间(秒)
+    pool_recycle=300,  # 连接回收时间(秒)
+    pool_pre_ping=True,  # 预检查连接是否可用，防止连接断开
+    echo=env.db_echo,  # 同步打印所有SQL，只在本地调试时开启（DB_ECHO=true）
+    future=True,  # 启用SQLAlchemy 2.0风格的未来模式API
+  ))
+  # 统计每个请求执行的SQL数量和耗时
+  instrument_engine(engine)
+  # 慢查询写入日志文件
+  slow_query_log.instrument(engine)
+  return engine
+
+
+# 主库引擎，所有写操作以及没有配置副本时的读操作都使用该引擎
+async_engine = new_async_engine(DATABASE_URL)
+
+# 当前请求的读操作是否固定使用主库：请求头带有X-DB-Primary时由中间件设置，请求中发生写操作后也会设置
+use_primary: ContextVar[bool] = ContextVar("use_primary", default=False)
+
+
+class EngineRouter:
+  """
+  读写分离的引擎路由：写操作使用主库，ModelService的读操作（list/item/items_by_ids/aggregate/export）轮询使用只读副本
+  副本有复制延迟，以下情况的读操作仍使用主库，保证能读到刚写入的数据：
+  - 当前请求设置了use_primary（请求头X-DB-Primary，或请求中已经发生过写操作）
+  - 读取的表在read_after_write_seconds秒内被当前进程写过
+  """
+
+  def __init__(
+    self,
+    primary: AsyncEngine,  # 主库引擎
+    replicas: List[AsyncEngine],  # 只读副本引擎，为空时读写都使用主库
+    read_after_write_seconds: float = 2,  # 表被写入后该时间（秒）内的读操作使用主库
+  ):
+    self.primary = primary
+    self.replicas = replicas
+    self.read_after_write_seconds = read_after_write_seconds
+    self._replica_cycle = itertools.cycle(replicas)
+    # 表名 -> 最近一次写入的时间
+    self._written_at = {}
+
+  # 读操作使用的引擎
+  def read_engine(self, table_name: str = None) -> AsyncEngine:
+    if not self.replicas or use_primary.get():
+      return self.primary
+    written_at = self._written_at.get(table_name)
+    if written_at is not None and time.monotonic() - written_at < self.read_after_write_seconds:
+      return self.primary
+    return next(self._replica_cycle)
+
+  # 表发生写操作之后调用：该表短时间内的读操作以及当前请求后续的读操作使用主库
+  def mark_written(self, table_name: str):
+    self._written_at[table_name] = time.monotonic()
+    use_primary.set(True)
+
+  async def dispose(self):
+    for engine in [self.primary, *self.replicas]:
+      await engine.dispose()
+
+
+engine_router = EngineRouter(
+  primary=async_engine,
+  replicas=[new_async_engine(url) for url in env.db_replica_urls],
+  read_after_write_seconds=env.db_read_after_write_seconds,
+)
 
 # 创建一个会话工厂函数
 async_session = sessionmaker(
@@ -40,6 +105,16 @@ async def get_async_session() -> AsyncSession:
 AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
 
 
+# 创建读操作使用的会话，按engine_router的规则选择主库或只读副本
+def read_session(table_name: str = None) -> AsyncSession:
+  return async_session(bind=engine_router.read_engine(table_name))
+
+
+# 会话是否连接的只读副本，副本上查询的结果可能落后于主库，不应写入共享缓存
+def is_replica_session(session: AsyncSession) -> bool:
+  return session.bind in engine_router.replicas
+
+
 # 用于启动服务的时候检查数据库连接是否正常
 async def check_database_connection():
   """检查数据库连接是否正常"""
@@ -50,6 +125,10 @@ async def check_database_connection():
       print(f"✅ 数据库{env.db_database}连接成功", env.db_host, env.db_port)
       # await conn.run_sync(SQLModel.metadata.create_all)
       print("✅ 创建user,role,user_roles_link表成功")
+    for replica in engine_router.replicas:
+      async with replica.connect() as conn:
+        await conn.execute(text("select 1"))
+        print("✅ 只读副本连接成功", replica.url.host, replica.url.port, replica.url.database)
   except Exception as e:
     # 打印连接失败信息及错误详情
     print(f"❌ Database connection failed: {e}")
@@ -0,0 +1,129 @@
+from typing import Optional, Any, Tuple, Dict, List
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import and_, bindparam
+
+from app.utils.model_registry import ModelMeta
+
+# 筛选条件DSL，filters中每个键为字段名，值为以下两种形式之一：
+#   1、普通值：字段 = 值，例如 {"status": "done"}，值为null时为 字段 IS NULL
+#   2、操作符字典：例如 {"valid_start": {"gte": "2025-01-01 00:00:00", "lte": "2025-02-01 00:00:00"}}
+# 支持的操作符：
+#   eq       等于
+#   in       在列表中，值为数组
+#   between  在区间内（包含边界），值为 [开始, 结束]
+#   gte      大于等于
+#   lte      小于等于
+#   prefix   字符串前缀匹配（LIKE 'xxx%'，可以使用索引）
+#   is_null  值为true时 IS NULL，为false时 IS NOT NULL
+
+FILTER_OPERATORS = ('eq', 'in', 'between', 'gte', 'lte', 'prefix', 'is_null')
+
+# LIKE 前缀匹配时使用的转义字符
+LIKE_ESCAPE = '/'
+
+
+class FilterCompiler:
+  """
+  将filters编译为SQLAlchemy条件表达式
+  字段名和字段类型来自模型元数据，只针对模型计算一次；编译结果按筛选条件的“形状”（字段 + 操作符）缓存，
+  条件中的值全部使用命名绑定参数，相同形状的查询复用同一个表达式对象，也就能命中SQLAlchemy的SQL编译缓存
+  """
+
+  def __init__(self, meta: ModelMeta):
+    # 字段名 -> 列对象
+    self.columns = meta.columns
+    # 字段名 -> 字段值的类型转换器（字符串日期时间转换为datetime等）
+    self.value_adapters = meta.value_adapters
+    # 筛选条件形状 -> 条件表达式
+    self.condition_cache: Dict[Tuple, Any] = {}
+
+  # 将filters规范化为 [(字段名, 操作符, 值)]，并校验字段名和操作符
+  def normalize(self, filters: dict) -> List[Tuple[str, str, Any]]:
+    invalid_keys = [key for key in filters.keys() if key not in self.columns]
+    if invalid_keys:
+      raise HTTPException(
+        status_code=500,
+        detail=f"Invalid filter keys: {invalid_keys}. Valid keys are: {list(self.columns.keys())}"
+      )
+
+    item_list = []
+    for key, value in filters.items():
+      if isinstance(value, dict):
+        invalid_operators = [operator for operator in value.keys() if operator not in FILTER_OPERATORS]
+        if invalid_operators:
+          raise HTTPException(
+            status_code=500,
+            detail=f"Invalid filter operators for {key}: {invalid_operators}. Valid operators are: {list(FILTER_OPERATORS)}"
+          )
+        item_list.extend((key, operator, operator_value) for operator, operator_value in value.items())
+      else:
+        item_list.append((key, 'eq', value))
+    return sorted(item_list, key=lambda item: (item[0], item[1]))
+
+  # 转换字段值的类型
+  def convert_value(self, key: str, value: Any) -> Any:
+    adapter = self.value_adapters.get(key)
+    if adapter is None:
+      return value
+    try:
+      return adapter.validate_python(value)
+    except ValidationError as e:
+      raise HTTPException(status_code=500, detail=f"Invalid filter value for {key}: {value}, {e.errors()[0]['msg']}")
+
+  # 编译filters，返回 (条件表达式, 绑定参数)，filters为空时条件表达式为None
+  def compile(self, filters: Optional[dict]) -> Tuple[Any, dict]:
+    if not filters:
+      return None, {}
+
+    item_list = self.normalize(filters)
+    params = {}
+    shape = []
+    for key, operator, value in item_list:
+      param_name = f"filter_{key}_{operator}"
+      if operator == 'is_null' or (operator == 'eq' and value is None):
+        # IS NULL / IS NOT NULL 不需要绑定参数，是否为空本身就是形状的一部分
+        shape.append((key, 'is_null', operator == 'eq' or bool(value)))
+        continue
+      if operator == 'in':
+        if not isinstance(value, list):
+          raise HTTPException(status_code=500, detail=f"Filter operator in for {key} requires a list")
+        params[param_name] = [self.convert_value(key, item) for item in value]
+      elif operator == 'between':
+        if not isinstance(value, list) or len(value) != 2:
+          raise HTTPException(status_code=500, detail=f"Filter operator between for {key} requires [start, end]")
+        params[f"{param_name}_start"] = self.convert_value(key, value[0])
+        params[f"{param_name}_end"] = self.convert_value(key, value[1])
+      elif operator == 'prefix':
+        # 转义LIKE通配符，再拼接 % 做前缀匹配
+        escaped = str(value).replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace('%', LIKE_ESCAPE + '%').replace('_', LIKE_ESCAPE + '_')
+        params[param_name] = escaped + '%'
+      else:
+        params[param_name] = self.convert_value(key, value)
+      shape.append((key, operator))
+
+    shape = tuple(shape)
+    condition = self.condition_cache.get(shape)
+    if condition is None:
+      condition = and_(*[self.build_expression(*item) for item in shape])
+      self.condition_cache[shape] = condition
+    return condition, params
+
+  # 根据 (字段名, 操作符) 创建使用命名绑定参数的条件表达式
+  def build_expression(self, key: str, operator: str, is_null: bool = None):
+    column = self.columns[key]
+    param_name = f"filter_{key}_{operator}"
+    if operator == 'is_null':
+      return column.is_(None) if is_null else column.is_not(None)
+    if operator == 'in':
+      return column.in_(bindparam(param_name, expanding=True))
+    if operator == 'between':
+      return column.between(bindparam(f"{param_name}_start"), bindparam(f"{param_name}_end"))
+    if operator == 'gte':
+      return column >= bindparam(param_name)
+    if operator == 'lte':
+      return column <= bindparam(param_name)
+    if operator == 'prefix':
+      return column.like(bindparam(param_name), escape=LIKE_ESCAPE)
+    return column == bindparam(param_name)
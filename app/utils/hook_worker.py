@@ -0,0 +1,110 @@
+import asyncio
+import contextvars
+from typing import Any, Callable, Optional
+
+from app.utils.db_utils import async_session
+
+
+# 标记ModelService的写操作after钩子（after_insert/after_update/after_delete/after_batch_*）为延迟执行
+# 标记后的钩子不在请求中执行，事务提交后放入进程内的工作池，由后台协程执行，失败时按间隔重试
+# 钩子收到的session为工作池新建的独立会话（接口的会话在响应返回后就会关闭）
+def deferred_hook(retries: int = 3, retry_delay: float = 1):
+  def decorator(hook):
+    hook.deferred = True
+    hook.retries = retries
+    hook.retry_delay = retry_delay
+    return hook
+
+  return decorator
+
+
+class HookWorkerPool:
+  """
+  延迟钩子的工作池（进程内）
+  任务放入有界队列，由固定数量的worker协程消费；队列已满时提交方等待空位，避免内存无限增长
+  worker在第一次提交任务时启动，应用关闭时调用drain等待队列中的任务执行完毕
+  """
+
+  def __init__(
+    self,
+    worker_count: int = 4,  # worker协程数量，即同时执行的钩子数量上限
+    max_queue_size: int = 1000,  # 队列最大长度
+  ):
+    self.worker_count = worker_count
+    self.max_queue_size = max_queue_size
+    self._queue: Optional[asyncio.Queue] = None
+    self._workers = []
+    # 执行成功/重试/最终失败的次数
+    self.succeeded = 0
+    self.retried = 0
+    self.failed = 0
+
+  # worker在空的上下文中启动，不继承第一次提交任务的请求的上下文变量（SQL统计、固定使用主库等）
+  def _start(self):
+    self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+    self._workers = [asyncio.create_task(self._worker(), context=contextvars.Context()) for _ in range(self.worker_count)]
+
+  # 提交钩子：args为钩子除session之外的参数，执行时追加独立会话作为最后一个参数
+  async def submit(self, hook: Callable, *args: Any):
+    if self._queue is None:
+      self._start()
+    await self._queue.put((hook, args))
+
+  async def _worker(self):
+    while True:
+      hook, args = await self._queue.get()
+      try:
+        await self._run(hook, args)
+      finally:
+        self._queue.task_done()
+
+  async def _run(self, hook: Callable, args: tuple):
+    retries = getattr(hook, 'retries', 0)
+    retry_delay = getattr(hook, 'retry_delay', 1)
+    for attempt in range(retries + 1):
+      try:
+        async with async_session() as session:
+          await hook(*args, session)
+        self.succeeded += 1
+        return
+      except Exception as e:
+        if attempt < retries:
+          self.retried += 1
+          delay = retry_delay * (attempt + 1)
+          print(f"❌ 延迟钩子{hook.__name__}执行失败，{delay}秒后第{attempt + 1}次重试: {e}")
+          await asyncio.sleep(delay)
+        else:
+          self.failed += 1
+          print(f"❌ 延迟钩子{hook.__name__}执行失败，已重试{retries}次，放弃执行: {e}")
+
+  # 当前排队等待执行的任务数
+  @property
+  def queue_depth(self) -> int:
+    return self._queue.qsize() if self._queue is not None else 0
+
+  # 等待队列中的任务执行完毕后停止worker，超时后直接停止，未执行的任务丢弃
+  async def drain(self, timeout: float = 30):
+    if self._queue is None:
+      return
+    try:
+      await asyncio.wait_for(self._queue.join(), timeout=timeout)
+    except asyncio.TimeoutError:
+      print(f"❌ 延迟钩子工作池关闭超时，丢弃{self.queue_depth}个未执行的任务")
+    for worker in self._workers:
+      worker.cancel()
+    await asyncio.gather(*self._workers, return_exceptions=True)
+    self._queue = None
+    self._workers = []
+
+  def stats(self) -> dict:
+    return {
+      "queue_depth": self.queue_depth,
+      "workers": len(self._workers),
+      "succeeded": self.succeeded,
+      "retried": self.retried,
+      "failed": self.failed,
+    }
+
+
+# 全局工作池，ModelService的延迟钩子都提交到这里
+hook_worker_pool = HookWorkerPool()
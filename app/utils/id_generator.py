@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from typing import List
+
+# ULID使用的Crockford Base32字符表
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+# snowflake时间戳的起始时间（2024-01-01 00:00:00 UTC，毫秒）
+SNOWFLAKE_EPOCH_MS = 1704067200000
+SNOWFLAKE_NODE_BITS = 10
+SNOWFLAKE_SEQUENCE_BITS = 12
+SNOWFLAKE_MAX_NODE_ID = (1 << SNOWFLAKE_NODE_BITS) - 1
+SNOWFLAKE_MAX_SEQUENCE = (1 << SNOWFLAKE_SEQUENCE_BITS) - 1
+
+
+class UlidGenerator:
+  """
+  ULID生成器：48位毫秒时间戳 + 80位随机数，编码为26位Crockford Base32字符串，字符串顺序即生成时间顺序
+  同一毫秒内在上一个随机数的基础上加1，保证进程内单调递增；不同进程（gunicorn worker）之间依靠80位随机数避免冲突
+  gunicorn使用preload_app时应用在fork之前就已经导入，生成时检查进程id，fork之后重新初始化状态
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._pid = None
+    self._last_ms = 0
+    self._last_random = 0
+
+  def generate(self) -> str:
+    with self._lock:
+      if self._pid != os.getpid():
+        self._pid = os.getpid()
+        self._last_ms = 0
+      ms = time.time_ns() // 1_000_000
+      if ms <= self._last_ms:
+        # 同一毫秒内（或系统时间回拨）沿用上一个时间戳，随机数加1
+        ms = self._last_ms
+        self._last_random += 1
+        if self._last_random >> 80:
+          # 随机数溢出时借用下一毫秒
+          ms += 1
+          self._last_random = int.from_bytes(os.urandom(10), "big")
+      else:
+        self._last_random = int.from_bytes(os.urandom(10), "big")
+      self._last_ms = ms
+      value = (ms << 80) | self._last_random
+
+    chars = []
+    for _ in range(26):
+      chars.append(CROCKFORD_BASE32[value & 31])
+      value >>= 5
+    return "".join(reversed(chars))
+
+  def generate_many(self, num: int) -> List[str]:
+    return [self.generate() for _ in range(num)]
+
+
+class SnowflakeGenerator:
+  """
+  snowflake生成器：41位毫秒时间戳 + 10位节点id + 12位序列号，补零为19位数字字符串，字符串顺序即生成时间顺序
+  节点id从环境变量ID_NODE_ID读取（gunicorn.conf.py的post_fork中为每个worker设置），未设置时使用进程id
+  同一毫秒内序列号用完时等待下一毫秒；fork之后重新读取节点id
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._pid = None
+    self._node_id = 0
+    self._last_ms = -1
+    self._sequence = 0
+
+  def _reset(self):
+    self._pid = os.getpid()
+    self._node_id = int(os.getenv("ID_NODE_ID", self._pid)) & SNOWFLAKE_MAX_NODE_ID
+    self._last_ms = -1
+    self._sequence = 0
+
+  def generate(self) -> str:
+    with self._lock:
+      if self._pid != os.getpid():
+        self._reset()
+      ms = time.time_ns() // 1_000_000 - SNOWFLAKE_EPOCH_MS
+      if ms < self._last_ms:
+        # 系统时间回拨时沿用上一个时间戳，避免生成重复或倒序的id
+        ms = self._last_ms
+      if ms == self._last_ms:
+        self._sequence = (self._sequence + 1) & SNOWFLAKE_MAX_SEQUENCE
+        if self._sequence == 0:
+          # 当前毫秒的序列号已用完，等待下一毫秒
+          while ms <= self._last_ms:
+            ms = time.time_ns() // 1_000_000 - SNOWFLAKE_EPOCH_MS
+      else:
+        self._sequence = 0
+      self._last_ms = ms
+      value = (ms << (SNOWFLAKE_NODE_BITS + SNOWFLAKE_SEQUENCE_BITS)) | (self._node_id << SNOWFLAKE_SEQUENCE_BITS) | self._sequence
+    return f"{value:019d}"
+
+  def generate_many(self, num: int) -> List[str]:
+    return [self.generate() for _ in range(num)]
+
+
+# 配置名称 -> 本地id生成器
+id_generators = {
+  "ulid": UlidGenerator(),
+  "snowflake": SnowflakeGenerator(),
+}
@@ -0,0 +1,85 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Awaitable, Callable, List, Optional
+
+
+class IdPool:
+  """
+  预取id池（进程内）
+  一次查询批量获取block_size个id缓存在内存中，取用时直接从内存返回；
+  剩余数量低于low_water时在后台补充，请求一般不需要等待查询，只有池中id不够时才等待补充完成（记为一次耗尽）
+  fetch_fn接收数量，返回id列表；单次补充超过max_fetch_size时分多次查询
+  """
+
+  def __init__(
+    self,
+    fetch_fn: Callable[[int], Awaitable[List[str]]],
+    block_size: int = 200,  # 每次补充的id数量
+    low_water: int = 50,  # 剩余数量低于该值时开始后台补充
+    max_fetch_size: int = 1000,  # 单次查询获取的最大id数量
+  ):
+    self.fetch_fn = fetch_fn
+    self.block_size = block_size
+    self.low_water = low_water
+    self.max_fetch_size = max_fetch_size
+    self._ids = deque()
+    self._refill_task: Optional[asyncio.Task] = None
+    # 池中id不够、调用方需要等待补充的次数
+    self.exhausted_count = 0
+    # 补充次数、补充总耗时、最大耗时（秒）
+    self.refill_count = 0
+    self.refill_seconds = 0.0
+    self.max_refill_seconds = 0.0
+
+  async def take(self, num: int = 1) -> List[str]:
+    if len(self._ids) < num:
+      self.exhausted_count += 1
+      while len(self._ids) < num:
+        await self._refill(num - len(self._ids) + self.block_size)
+    id_list = [self._ids.popleft() for _ in range(num)]
+    if len(self._ids) < self.low_water:
+      self._start_refill(self.block_size)
+    return id_list
+
+  # 启动后台补充，已经在补充时不重复启动
+  # 补充的id由多个请求共享，补充任务在空的上下文中执行，不计入触发补充的请求的SQL统计
+  def _start_refill(self, num: int):
+    if self._refill_task is None or self._refill_task.done():
+      self._refill_task = asyncio.create_task(self._fetch(num), context=contextvars.Context())
+      self._refill_task.add_done_callback(self._log_refill_error)
+
+  @staticmethod
+  def _log_refill_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+      print(f"❌ IdPool后台补充id失败: {task.exception()}")
+
+  # 等待补充完成：有正在进行的补充时等待它完成，否则启动一次新的补充
+  async def _refill(self, num: int):
+    if self._refill_task is not None and not self._refill_task.done():
+      # 后台补充失败时，异常交给下一次循环重新补充时抛出
+      await asyncio.wait([self._refill_task])
+      return
+    self._refill_task = asyncio.create_task(self._fetch(num), context=contextvars.Context())
+    await self._refill_task
+
+  async def _fetch(self, num: int):
+    start = time.perf_counter()
+    while num > 0:
+      size = min(num, self.max_fetch_size)
+      self._ids.extend(await self.fetch_fn(size))
+      num -= size
+    elapsed = time.perf_counter() - start
+    self.refill_count += 1
+    self.refill_seconds += elapsed
+    self.max_refill_seconds = max(self.max_refill_seconds, elapsed)
+
+  def stats(self) -> dict:
+    return {
+      "size": len(self._ids),
+      "exhausted_count": self.exhausted_count,
+      "refill_count": self.refill_count,
+      "avg_refill_ms": self.refill_seconds / self.refill_count * 1000 if self.refill_count else 0,
+      "max_refill_ms": self.max_refill_seconds * 1000,
+    }
@@ -0,0 +1,157 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, List
+
+from redis.exceptions import WatchError
+
+from app.utils.redis_utils import RedisManager
+
+
+class ItemCache:
+  """
+  单条记录的两级缓存：进程内LRU（带过期时间） + Redis
+  key由调用方按 表名:主键 拼接，value为记录序列化后的字典
+  多个gunicorn worker之间只有Redis是共享的，进程内缓存的过期时间应设置得较短，用来兜底其他worker写入后的短暂不一致
+  回填缓存前先用version获取版本，查询期间记录被删除（更新/删除后调用delete）时版本发生变化，set不再写入查询到的旧数据
+  """
+
+  def __init__(
+    self,
+    local_max_size: int = 1000,  # 进程内缓存的最大条数，超出后淘汰最久未使用的记录
+    local_ttl: float = 5,  # 进程内缓存有效期（秒）
+    redis_ttl: int = 300,  # Redis缓存有效期（秒）
+    use_redis: bool = True,  # 是否启用Redis二级缓存
+    key_prefix: str = "item_cache",  # Redis key前缀
+  ):
+    self.local_max_size = local_max_size
+    self.local_ttl = local_ttl
+    self.redis_ttl = redis_ttl
+    self.use_redis = use_redis
+    self.key_prefix = key_prefix
+    # key -> (过期时间戳, 记录字典)
+    self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+    # 当前进程调用delete的次数，作为进程内缓存的版本
+    self._delete_count = 0
+    # 命中/未命中计数
+    self.local_hits = 0
+    self.redis_hits = 0
+    self.misses = 0
+
+  def _redis_key(self, key: str) -> str:
+    return f"{self.key_prefix}:{key}"
+
+  # 每条记录在Redis中的版本号，delete时加1
+  def _version_key(self, key: str) -> str:
+    return f"{self.key_prefix}:version:{key}"
+
+  def _local_get(self, key: str) -> Optional[dict]:
+    entry = self._local.get(key)
+    if entry is None:
+      return None
+    expire_at, value = entry
+    if expire_at < time.monotonic():
+      self._local.pop(key, None)
+      return None
+    # 标记为最近使用
+    self._local.move_to_end(key)
+    return value
+
+  def _local_set(self, key: str, value: dict):
+    self._local[key] = (time.monotonic() + self.local_ttl, value)
+    self._local.move_to_end(key)
+    while len(self._local) > self.local_max_size:
+      self._local.popitem(last=False)
+
+  async def get(self, key: str) -> Optional[dict]:
+    value = self._local_get(key)
+    if value is not None:
+      self.local_hits += 1
+      return value
+
+    if self.use_redis:
+      try:
+        redis_client = await RedisManager.get_instance()
+        raw = await redis_client.get(self._redis_key(key))
+      except Exception as e:
+        # 缓存不可用时不影响正常查询，直接回源数据库
+        print(f"❌ ItemCache读取Redis失败: {e}")
+        raw = None
+      if raw is not None:
+        value = json.loads(raw)
+        self._local_set(key, value)
+        self.redis_hits += 1
+        return value
+
+    self.misses += 1
+    return None
+
+  # 查询数据库之前调用，获取key当前的版本：(进程内版本, Redis中的版本)，Redis不可用时Redis版本为None
+  async def version(self, key: str) -> tuple:
+    redis_version = None
+    if self.use_redis:
+      try:
+        redis_client = await RedisManager.get_instance()
+        redis_version = await redis_client.get(self._version_key(key)) or "0"
+      except Exception as e:
+        print(f"❌ ItemCache读取版本号失败: {e}")
+    return self._delete_count, redis_version
+
+  # 写入缓存；传入version时，只有版本与查询前相同（期间没有被其他请求更新或删除）才写入
+  async def set(self, key: str, value: dict, version: tuple = None):
+    if version is not None and version[0] != self._delete_count:
+      return
+    if self.use_redis:
+      if version is not None and version[1] is None:
+        # 查询前Redis不可用，无法判断版本是否变化，不写入
+        return
+      try:
+        redis_client = await RedisManager.get_instance()
+        raw = json.dumps(value, ensure_ascii=False)
+        if version is None:
+          await redis_client.set(self._redis_key(key), raw, ex=self.redis_ttl)
+        else:
+          # WATCH版本号，版本号在检查之后、写入之前发生变化时事务执行失败（WatchError）
+          async with redis_client.pipeline(transaction=True) as pipe:
+            await pipe.watch(self._version_key(key))
+            if (await pipe.get(self._version_key(key)) or "0") != version[1]:
+              await pipe.unwatch()
+              return
+            pipe.multi()
+            pipe.set(self._redis_key(key), raw, ex=self.redis_ttl)
+            await pipe.execute()
+      except WatchError:
+        return
+      except Exception as e:
+        print(f"❌ ItemCache写入Redis失败: {e}")
+    # 等待Redis期间可能发生了删除，再检查一次进程内版本
+    if version is not None and version[0] != self._delete_count:
+      return
+    self._local_set(key, value)
+
+  async def delete(self, key_list: List[str]):
+    self._delete_count += 1
+    for key in key_list:
+      self._local.pop(key, None)
+    if self.use_redis and key_list:
+      try:
+        redis_client = await RedisManager.get_instance()
+        # 先增加版本号再删除缓存，正在回填的旧数据因版本变化不会再写入；版本号与缓存同样设置过期时间
+        async with redis_client.pipeline(transaction=True) as pipe:
+          for key in key_list:
+            pipe.incr(self._version_key(key))
+            pipe.expire(self._version_key(key), self.redis_ttl)
+          pipe.delete(*[self._redis_key(key) for key in key_list])
+          await pipe.execute()
+      except Exception as e:
+        print(f"❌ ItemCache删除Redis缓存失败: {e}")
+
+  def stats(self) -> dict:
+    total = self.local_hits + self.redis_hits + self.misses
+    return {
+      "local_hits": self.local_hits,
+      "redis_hits": self.redis_hits,
+      "misses": self.misses,
+      "hit_rate": (self.local_hits + self.redis_hits) / total if total else 0,
+      "local_size": len(self._local),
+    }
@@ -0,0 +1,40 @@
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.utils.row_serializer import DATETIME_FORMAT, DATE_FORMAT
+
+
+# orjson无法直接序列化的值的转换函数，datetime/date使用与BasicModel中json_encoders相同的格式
+def orjson_default(value: Any):
+  if isinstance(value, datetime):
+    return value.strftime(DATETIME_FORMAT)
+  if isinstance(value, date):
+    return value.strftime(DATE_FORMAT)
+  # MySQL的sum/avg等聚合结果为Decimal
+  if isinstance(value, Decimal):
+    return float(value)
+  if isinstance(value, BaseModel):
+    return value.model_dump()
+  raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# 将内容序列化为JSON字节串
+def orjson_dumps(content: Any) -> bytes:
+  # OPT_PASSTHROUGH_DATETIME：datetime/date不使用orjson默认的ISO格式，交给orjson_default格式化
+  return orjson.dumps(content, default=orjson_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+  """
+  基于orjson的JSON响应
+  接口直接返回该响应时，FastAPI不再按response_model校验返回值，也不再经过jsonable_encoder，
+  返回内容应当是已经由预先编译的序列化器转换好的字典/列表
+  """
+
+  def render(self, content: Any) -> bytes:
+    return orjson_dumps(content)
@@ -0,0 +1,81 @@
+import hashlib
+import json
+from typing import Optional
+
+from app.utils.redis_utils import RedisManager
+
+
+class ListCache:
+  """
+  分页查询结果缓存（Redis）
+  每张表在Redis中维护一个版本号，缓存key = 前缀:表名:版本号:查询参数哈希，
+  表发生写操作时只需要将版本号加1，旧版本的所有分页缓存即全部失效（不需要扫描删除key，旧key等待过期即可）
+  缓存的值是已经序列化好的响应JSON字符串，命中时直接返回，跳过ORM和Pydantic
+  """
+
+  def __init__(
+    self,
+    ttl: int = 60,  # 分页结果缓存有效期（秒）
+    key_prefix: str = "list_cache",  # Redis key前缀
+  ):
+    self.ttl = ttl
+    self.key_prefix = key_prefix
+    # 命中/未命中计数
+    self.hits = 0
+    self.misses = 0
+
+  def _version_key(self, table_name: str) -> str:
+    return f"{self.key_prefix}:version:{table_name}"
+
+  @staticmethod
+  def hash_params(params: dict) -> str:
+    # 对查询参数排序后序列化再取哈希，保证相同参数不同键顺序得到相同的key
+    raw = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+  # 获取当前版本号下该查询参数对应的缓存key
+  async def make_key(self, table_name: str, params: dict) -> Optional[str]:
+    try:
+      redis_client = await RedisManager.get_instance()
+      version = await redis_client.get(self._version_key(table_name)) or "0"
+    except Exception as e:
+      # 缓存不可用时不影响正常查询
+      print(f"❌ ListCache读取版本号失败: {e}")
+      return None
+    return f"{self.key_prefix}:{table_name}:{version}:{self.hash_params(params)}"
+
+  async def get(self, key: str) -> Optional[str]:
+    try:
+      redis_client = await RedisManager.get_instance()
+      content = await redis_client.get(key)
+    except Exception as e:
+      print(f"❌ ListCache读取缓存失败: {e}")
+      content = None
+    if content is None:
+      self.misses += 1
+    else:
+      self.hits += 1
+    return content
+
+  async def set(self, key: str, content: str):
+    try:
+      redis_client = await RedisManager.get_instance()
+      await redis_client.set(key, content, ex=self.ttl)
+    except Exception as e:
+      print(f"❌ ListCache写入缓存失败: {e}")
+
+  # 表数据发生变化，版本号加1，使该表的所有分页缓存失效
+  async def bump_version(self, table_name: str):
+    try:
+      redis_client = await RedisManager.get_instance()
+      await redis_client.incr(self._version_key(table_name))
+    except Exception as e:
+      print(f"❌ ListCache更新版本号失败: {e}")
+
+  def stats(self) -> dict:
+    total = self.hits + self.misses
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "hit_rate": self.hits / total if total else 0,
+    }
@@ -0,0 +1,85 @@
+from datetime import datetime, date
+from typing import Type, Optional, Dict, Any
+
+from pydantic import TypeAdapter
+from sqlalchemy import UniqueConstraint
+
+
+class ModelMeta:
+  """
+  模型元数据：在模型第一次使用时计算一次，后续的请求处理（字段校验、排序、筛选、日期解析等）直接查表，
+  不再在每次请求中调用 hasattr/getattr 或者遍历 model_fields
+  """
+
+  def __init__(self, Cls: Type[Any]):
+    self.Cls = Cls
+    model_fields = getattr(Cls, 'model_fields', {})
+    # 模型字段名集合
+    self.field_names = frozenset(model_fields.keys())
+    # 字段名 -> 字段类型注解
+    self.field_types: Dict[str, Any] = {key: field.annotation for key, field in model_fields.items()}
+    # 关系属性名集合（Relationship声明的属性）
+    self.relationship_names = frozenset(getattr(Cls, '__sqlmodel_relationships__', {}).keys())
+    # 允许出现在请求数据中的属性名：字段 + 关系属性
+    self.attribute_names = self.field_names | self.relationship_names
+    # 类型注解为datetime/date的字段（用于把字符串解析为日期时间）
+    self.datetime_fields = frozenset(key for key, annotation in self.field_types.items() if annotation is datetime)
+    self.date_fields = frozenset(key for key, annotation in self.field_types.items() if annotation is date)
+
+    table = getattr(Cls, '__table__', None)
+    # 数据库列名 -> 模型上的列属性（用于构建查询条件和排序）
+    self.columns: Dict[str, Any] = {key: getattr(Cls, key) for key in table.columns.keys()} if table is not None else {}
+    # 数据库列名 -> 列的python类型
+    self.column_python_types: Dict[str, Optional[type]] = {key: self._python_type(column) for key, column in self.columns.items()}
+    # 有索引可用的列：主键、声明了index/unique的列，以及各个索引/唯一约束的最左列
+    self.indexed_columns = frozenset(self._indexed_columns(table)) if table is not None else frozenset()
+    # 主键之外有唯一约束的列：声明了unique的列、唯一索引和唯一约束中的列
+    self.unique_columns = frozenset(self._unique_columns(table)) if table is not None else frozenset()
+    # 列名 -> 列值的类型转换器（筛选条件中的字符串日期时间转换为datetime等）
+    self.value_adapters: Dict[str, TypeAdapter] = {
+      key: TypeAdapter(Optional[self.field_types[key]]) for key in self.columns.keys() if key in self.field_types
+    }
+
+  @staticmethod
+  def _python_type(column) -> Optional[type]:
+    try:
+      return column.type.python_type
+    except NotImplementedError:
+      return None
+
+  @staticmethod
+  def _unique_columns(table):
+    for column in table.columns:
+      if column.unique:
+        yield column.key
+    for index in table.indexes:
+      if index.unique:
+        yield from (column.key for column in index.columns)
+    for constraint in table.constraints:
+      if isinstance(constraint, UniqueConstraint):
+        yield from (column.key for column in constraint.columns)
+
+  @staticmethod
+  def _indexed_columns(table):
+    for column in table.columns:
+      if column.primary_key or column.index or column.unique:
+        yield column.key
+    for index in table.indexes:
+      if index.columns:
+        yield list(index.columns)[0].key
+    for constraint in table.constraints:
+      if isinstance(constraint, UniqueConstraint) and constraint.columns:
+        yield list(constraint.columns)[0].key
+
+
+# 模型类 -> 模型元数据
+_model_registry: Dict[type, ModelMeta] = {}
+
+
+# 获取模型的元数据，第一次获取时计算并缓存
+def get_model_meta(Cls: Type[Any]) -> ModelMeta:
+  meta = _model_registry.get(Cls)
+  if meta is None:
+    meta = ModelMeta(Cls)
+    _model_registry[Cls] = meta
+  return meta
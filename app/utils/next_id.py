@@ -1,23 +1,54 @@
+from typing import List
+
 from fastapi import FastAPI
 from sqlalchemy import text
 
+from app.config.env import env
 from app.utils.db_utils import async_session
+from app.utils.id_generator import id_generators
+from app.utils.id_pool import IdPool
 
 
+# 生成num个唯一id，num为1时直接返回id字符串，否则返回id列表
+# 生成方式由配置ID_GENERATOR决定：ulid/snowflake在进程内生成，不需要查询数据库；uuid由数据库生成
 async def next_id(num: int = 1):
+  generator = id_generators.get(env.id_generator)
+  # 数据库生成的id从预取池中获取，池中id不足时才等待查询
+  arr = generator.generate_many(num) if generator is not None else await id_pool.take(num)
+  return arr[0] if num == 1 else arr
+
+
+# 通过MySQL的uuid()生成id，一次查询生成num个
+async def db_next_id(num: int = 1):
   async with async_session() as session:
     sql_string = "select " + ",".join([f"uuid() as _{index}" for index in range(num)])
-    print(sql_string)
     result = await session.execute(text(sql_string))
     val = result.first()
-    print(val)
     arr = list(val or [])
     return arr[0] if num == 1 else arr
 
 
+# 预取池使用的批量查询，始终返回id列表
+async def fetch_db_ids(num: int) -> List[str]:
+  id_list = await db_next_id(num)
+  return [id_list] if num == 1 else id_list
+
+
+# 数据库生成id的预取池，每次查询获取一批id
+id_pool = IdPool(fetch_db_ids)
+
+
 def add_next_id_route(app: FastAPI):
   @app.get("/next_id")
   async def _next_id(num: int = 1):
     return {
       "data": await next_id(num),
     }
+
+  # 查看数据库id预取池的状态：剩余数量、耗尽次数、补充耗时
+  @app.get("/next_id/stats")
+  async def _next_id_stats():
+    return {
+      "id_generator": env.id_generator,
+      "id_pool": id_pool.stats(),
+    }
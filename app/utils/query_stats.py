@@ -0,0 +1,59 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.env import env
+
+
+class QueryBudgetExceeded(Exception):
+  """请求执行的SQL数量超过db_query_budget（db_query_budget_mode为raise时抛出）"""
+
+
+class QueryStats:
+  """
+  单个请求内执行的SQL统计：语句数量、数据库耗时、每种语句（参数化之后的SQL文本）的执行次数
+  同一种语句在一个请求内重复执行多次，一般是在循环中逐条查询关联数据（N+1），应改为批量查询或预加载
+  """
+
+  def __init__(self):
+    self.count = 0
+    self.seconds = 0.0
+    self.shapes = Counter()
+
+  # 执行次数达到threshold的语句，按次数从多到少排列
+  def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+    return [(statement, count) for statement, count in self.shapes.most_common() if count >= threshold]
+
+
+# 当前请求的SQL统计，由中间件在请求开始时设置；不在请求中执行的SQL（后台任务等）不统计
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  stats = current_query_stats.get()
+  if stats is None:
+    return
+  stats.count += 1
+  stats.shapes[statement] += 1
+  if env.db_query_budget_mode == "raise" and 0 < env.db_query_budget < stats.count:
+    raise QueryBudgetExceeded(f"请求执行的SQL数量超过限制{env.db_query_budget}: {statement}")
+  context.query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  stats = current_query_stats.get()
+  if stats is None:
+    return
+  start_time = getattr(context, "query_start_time", None)
+  if start_time is not None:
+    stats.seconds += time.perf_counter() - start_time
+
+
+# 在引擎上注册SQL执行事件，统计每个请求执行的SQL
+def instrument_engine(engine: AsyncEngine):
+  event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+  event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
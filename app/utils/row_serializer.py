@@ -0,0 +1,52 @@
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional, Tuple, Annotated
+
+from pydantic import TypeAdapter, PlainSerializer
+from typing_extensions import TypedDict
+
+# 接口返回的日期时间格式，与BasicModel中的json_encoders保持一致
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+
+
+# 格式化日期时间，来自缓存的值已经是字符串，原样返回
+def format_datetime(value) -> str:
+  return value.strftime(DATETIME_FORMAT) if isinstance(value, datetime) else value
+
+
+def format_date(value) -> str:
+  return value.strftime(DATE_FORMAT) if isinstance(value, date) else value
+
+
+DatetimeField = Annotated[datetime, PlainSerializer(format_datetime, return_type=str, when_used='json-unless-none')]
+DateField = Annotated[date, PlainSerializer(format_date, return_type=str, when_used='json-unless-none')]
+
+
+# 将字段类型注解转换为序列化使用的类型，datetime/date使用统一的字符串格式
+def serialize_annotation(annotation: Any) -> Any:
+  if annotation is datetime:
+    return Optional[DatetimeField]
+  if annotation is date:
+    return Optional[DateField]
+  return Optional[annotation]
+
+
+# 根据字段及其类型创建字典行的序列化器，返回 (列表响应序列化器, 单条响应序列化器, 按id批量查询响应序列化器)
+# 序列化器基于TypedDict，直接序列化数据库查询得到的字典行，不做校验也不创建模型实例
+def build_row_serializers(name: str, field_types: Dict[str, Any]) -> Tuple[TypeAdapter, TypeAdapter, TypeAdapter]:
+  Row = TypedDict(f"{name}Row", {field: serialize_annotation(annotation) for field, annotation in field_types.items()})
+  ListResult = TypedDict(f"{name}RowListResponse", {"list": List[Row], "has_next": bool, "total": Optional[int], "next_cursor": Optional[str]})
+  ItemResult = TypedDict(f"{name}RowItemResponse", {"result": Optional[Row]})
+  LookupResult = TypedDict(f"{name}RowLookupResponse", {"result": List[Optional[Row]]})
+  return TypeAdapter(ListResult), TypeAdapter(ItemResult), TypeAdapter(LookupResult)
+
+
+# 根据模型类创建预先编译的响应序列化器，返回 (列表响应序列化器, 单条响应序列化器, 批量响应序列化器, 按id批量查询响应序列化器)
+# 直接序列化模型实例，不会像response_model那样先校验一遍返回值；按id批量查询时不存在的id对应null
+def build_model_serializers(Cls: type) -> Tuple[TypeAdapter, TypeAdapter, TypeAdapter, TypeAdapter]:
+  ListResult = TypedDict(f"{Cls.__name__}ListResult", {"list": List[Cls], "has_next": bool, "total": Optional[int], "next_cursor": Optional[str]})
+  ItemResult = TypedDict(f"{Cls.__name__}ItemResult", {"result": Optional[Cls]})
+  BatchResult = TypedDict(f"{Cls.__name__}BatchResult", {"result": List[Cls]})
+  LookupResult = TypedDict(f"{Cls.__name__}LookupResult", {"result": List[Optional[Cls]]})
+  return TypeAdapter(ListResult), TypeAdapter(ItemResult), TypeAdapter(BatchResult), TypeAdapter(LookupResult)
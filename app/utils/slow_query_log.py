@@ -0,0 +1,150 @@
+import hashlib
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.env import env
+from app.utils.json_response import orjson_dumps
+from app.utils.row_serializer import DATETIME_FORMAT
+
+
+class SlowQueryLog:
+  """
+  慢查询日志：耗时达到threshold_ms的SQL按sample_rate抽样，记录SQL模板、参数哈希、耗时、行数，
+  每条一行JSON写入文件（同一个文件可能由多个gunicorn worker写入，记录中带有进程id）
+  记录放入有界队列，由后台线程写文件，执行SQL的协程不等待磁盘IO；队列已满时丢弃记录并计数
+  gunicorn使用preload_app时应用在fork之前就已经导入，写入线程在第一次记录时启动，fork之后重新启动
+  """
+
+  def __init__(
+    self,
+    file_path: str,  # 日志文件路径
+    threshold_ms: float = 200,  # 耗时达到该值（毫秒）的SQL视为慢查询
+    sample_rate: float = 1.0,  # 慢查询的记录比例，0~1
+    explain: bool = False,  # 是否对慢查询的SELECT语句执行EXPLAIN并记录执行计划
+    max_queue_size: int = 10000,  # 等待写入的记录数上限
+  ):
+    self.file_path = file_path
+    self.threshold_ms = threshold_ms
+    self.sample_rate = sample_rate
+    self.explain = explain
+    self.max_queue_size = max_queue_size
+    self._lock = threading.Lock()
+    self._pid = None
+    self._queue: Optional[queue.Queue] = None
+    self._thread: Optional[threading.Thread] = None
+    # 记录的慢查询数量、队列已满丢弃的数量
+    self.logged = 0
+    self.dropped = 0
+
+  def _start(self):
+    with self._lock:
+      if self._pid == os.getpid():
+        return
+      self._pid = os.getpid()
+      self._queue = queue.Queue(maxsize=self.max_queue_size)
+      self._thread = threading.Thread(target=self._write_loop, args=(self._queue,), name="slow-query-log", daemon=True)
+      self._thread.start()
+
+  def _write_loop(self, record_queue: queue.Queue):
+    directory = os.path.dirname(self.file_path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    with open(self.file_path, "ab") as file:
+      while True:
+        record = record_queue.get()
+        if record is None:
+          break
+        file.write(orjson_dumps(record) + b"\n")
+        # 队列中暂时没有记录时再刷新到磁盘，连续写入时合并成一次
+        if record_queue.empty():
+          file.flush()
+
+  def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+    context.slow_query_start_time = time.perf_counter()
+
+  def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+    start_time = getattr(context, "slow_query_start_time", None)
+    if start_time is None:
+      return
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    if duration_ms < self.threshold_ms or random.random() >= self.sample_rate:
+      return
+    record = {
+      "time": datetime.now().strftime(DATETIME_FORMAT),
+      "pid": os.getpid(),
+      "duration_ms": round(duration_ms, 2),
+      "rows": cursor.rowcount,
+      "statement": statement,
+      # 参数可能包含用户数据，只记录哈希，用于区分同一条SQL的不同参数
+      "params_hash": hashlib.sha1(repr(parameters).encode()).hexdigest()[:16],
+      "executemany": executemany,
+    }
+    if self.explain and not executemany and statement.lstrip()[:6].upper() == "SELECT":
+      if context.execution_options.get("stream_results") or getattr(context, "_is_server_side", False):
+        # 流式查询（导出接口）的服务端游标还没有读完，在同一个连接上执行其他SQL会丢弃未读取的行
+        record["explain"] = "流式查询不执行EXPLAIN"
+      else:
+        record["explain"] = self._explain(conn, statement, parameters)
+    self.put(record)
+
+  # 在同一个连接上执行EXPLAIN，失败时记录错误信息，不影响原SQL的执行结果
+  @staticmethod
+  def _explain(conn, statement, parameters):
+    try:
+      cursor = conn.connection.cursor()
+      try:
+        cursor.execute(f"EXPLAIN {statement}", parameters)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+      finally:
+        cursor.close()
+    except Exception as e:
+      return f"EXPLAIN失败: {e}"
+
+  def put(self, record: dict):
+    if self._pid != os.getpid():
+      self._start()
+    try:
+      self._queue.put_nowait(record)
+      self.logged += 1
+    except queue.Full:
+      self.dropped += 1
+
+  # 在引擎上注册SQL执行事件，记录慢查询
+  def instrument(self, engine: AsyncEngine):
+    event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+  # 写完队列中剩余的记录后停止写入线程，应用关闭时调用
+  def close(self, timeout: float = 5):
+    if self._pid != os.getpid() or self._thread is None:
+      return
+    self._queue.put(None)
+    self._thread.join(timeout)
+    self._pid = None
+    self._queue = None
+    self._thread = None
+
+  def stats(self) -> dict:
+    return {
+      "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+      "logged": self.logged,
+      "dropped": self.dropped,
+    }
+
+
+# 全局慢查询日志，async_engine的SQL都记录到这里
+slow_query_log = SlowQueryLog(
+  file_path=env.slow_query_log_file,
+  threshold_ms=env.slow_query_threshold_ms,
+  sample_rate=env.slow_query_sample_rate,
+  explain=env.slow_query_explain,
+)
@@ -0,0 +1,74 @@
+# 对比不同id生成方式下的id生成速度和单条插入吞吐量
+#   uuid：每个id查询一次MySQL的uuid()（db_next_id）
+#   uuid_pool：从预取池获取MySQL的uuid()，池中id不足时批量查询（ID_GENERATOR=uuid时next_id的方式）
+#   ulid/snowflake：进程内生成
+# 使用 .env 中配置的数据库，向llm_order插入测试数据，结束后删除
+# 运行方式（在项目根目录）：
+#   python -m benchmark.next_id_benchmark --rows 2000 --concurrency 10
+import argparse
+import asyncio
+import time
+
+from app.config.env import env
+from app.model.LlmOrder import LlmOrderService
+from app.utils.db_utils import async_engine, async_session
+from app.utils.next_id import db_next_id, next_id
+
+# 名称、ID_GENERATOR配置、生成单个id的函数
+ID_GENERATORS = [
+  ("uuid", "uuid", db_next_id),
+  ("uuid_pool", "uuid", next_id),
+  ("ulid", "ulid", next_id),
+  ("snowflake", "snowflake", next_id),
+]
+
+
+async def bench_next_id(new_id, count: int) -> float:
+  start = time.perf_counter()
+  for _ in range(count):
+    await new_id()
+  return count / (time.perf_counter() - start)
+
+
+async def bench_insert(new_id, rows: int, concurrency: int) -> tuple[float, list]:
+  id_list = []
+  queue = asyncio.Queue()
+  for index in range(rows):
+    queue.put_nowait(index)
+
+  # 每个并发任务使用独立会话逐条插入，模拟接口请求；id由new_id生成后传入
+  async def worker():
+    async with async_session() as session:
+      while not queue.empty():
+        index = queue.get_nowait()
+        row_dict = {"id": await new_id(), "prod_id": f"benchmark_{index % 10}", "user_id": "benchmark"}
+        insert_cls = await LlmOrderService.item_insert(session, row_dict)
+        id_list.append(insert_cls.id)
+
+  start = time.perf_counter()
+  await asyncio.gather(*[worker() for _ in range(concurrency)])
+  return rows / (time.perf_counter() - start), id_list
+
+
+async def main(rows: int, concurrency: int):
+  # 关闭SQL日志，避免输出影响耗时
+  async_engine.echo = False
+  print(f"rows={rows} concurrency={concurrency}")
+  for name, id_generator, new_id in ID_GENERATORS:
+    env.id_generator = id_generator
+    next_id_rate = await bench_next_id(new_id, rows)
+    insert_rate, id_list = await bench_insert(new_id, rows, concurrency)
+    print(f"{name:<10} next_id: {next_id_rate:10.0f} 个/秒  插入: {insert_rate:8.0f} 条/秒  示例id: {id_list[0]}")
+    # 删除测试数据
+    async with async_session() as session:
+      await LlmOrderService.batch_delete(session, [{"id": id_value} for id_value in id_list])
+
+  await async_engine.dispose()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="对比不同id生成方式的插入吞吐量")
+  parser.add_argument("--rows", type=int, default=2000, help="每种方式插入的记录数")
+  parser.add_argument("--concurrency", type=int, default=10, help="并发插入的任务数")
+  args = parser.parse_args()
+  asyncio.run(main(args.rows, args.concurrency))
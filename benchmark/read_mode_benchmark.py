@@ -0,0 +1,77 @@
+# 对比分页/单条查询接口在 orm 与 core 两种 read_mode 下的耗时
+# 使用 .env 中配置的数据库，接口通过 httpx 的 ASGITransport 在进程内调用，不经过网络
+# 运行方式（在项目根目录）：
+#   python -m benchmark.read_mode_benchmark --page-size 100 --iterations 200
+#   python -m benchmark.read_mode_benchmark --seed 1000   # 先向lg_message插入1000条测试数据
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.model.LgMessage import LgMessage
+from app.utils.create_module_service import create_model_service
+from app.utils.db_utils import async_engine
+
+# 两个服务只有read_mode不同，都不开启缓存，保证每次请求都查询数据库
+OrmService = create_model_service(LgMessage, read_mode='orm')
+CoreService = create_model_service(LgMessage, read_mode='core')
+
+
+async def seed(client: httpx.AsyncClient, count: int):
+  row_dict_list = [
+    {"title": f"benchmark {index}", "status": "done", "content": "benchmark " * 50}
+    for index in range(count)
+  ]
+  response = await client.post("/orm/batch_insert", json=row_dict_list)
+  response.raise_for_status()
+  print(f"插入测试数据 {count} 条")
+
+
+async def run(client: httpx.AsyncClient, path: str, payload: dict, iterations: int) -> float:
+  # 预热一次，排除首次编译SQL、创建序列化器的耗时
+  (await client.post(path, json=payload)).raise_for_status()
+  start = time.perf_counter()
+  for _ in range(iterations):
+    (await client.post(path, json=payload)).raise_for_status()
+  return (time.perf_counter() - start) / iterations * 1000
+
+
+async def main(page_size: int, iterations: int, seed_count: int):
+  # 关闭SQL日志，避免输出影响耗时
+  async_engine.echo = False
+
+  app = FastAPI()
+  OrmService.add_route(app, "/orm", end_points=['list', 'item', 'batch_insert'])
+  CoreService.add_route(app, "/core", end_points=['list', 'item'])
+
+  async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+    if seed_count:
+      await seed(client, seed_count)
+
+    list_payload = {"page_size": page_size}
+    first_page = (await client.post("/core/list", json=list_payload)).json()
+    if not first_page["list"]:
+      print("lg_message表中没有数据，请使用 --seed 插入测试数据")
+      return
+    # 两种模式的返回结果应当完全一致
+    assert first_page == (await client.post("/orm/list", json=list_payload)).json()
+    item_payload = {"id": first_page["list"][0]["id"]}
+
+    print(f"page_size={page_size} iterations={iterations} rows={len(first_page['list'])}")
+    for name, path, payload in [("list", "list", list_payload), ("item", "item", item_payload)]:
+      orm_ms = await run(client, f"/orm/{path}", payload, iterations)
+      core_ms = await run(client, f"/core/{path}", payload, iterations)
+      print(f"{name:<5} orm: {orm_ms:8.2f} ms/次  core: {core_ms:8.2f} ms/次  提升: {orm_ms / core_ms:5.2f}x")
+
+  await async_engine.dispose()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="对比 read_mode=orm 与 read_mode=core 的查询接口耗时")
+  parser.add_argument("--page-size", type=int, default=100, help="分页查询每页条数")
+  parser.add_argument("--iterations", type=int, default=200, help="每个接口的请求次数")
+  parser.add_argument("--seed", type=int, default=0, help="测试前向lg_message插入的测试数据条数")
+  args = parser.parse_args()
+  asyncio.run(main(args.page_size, args.iterations, args.seed))
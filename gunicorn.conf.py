@@ -57,3 +57,7 @@ max_requests_jitter = 100
 # 预加载应用
 preload_app = True
 
+
+# 工作进程fork之后执行：为每个工作进程设置不同的节点id，供snowflake id生成器使用
+def post_fork(server, worker):
+    os.environ["ID_NODE_ID"] = str(worker.age % 1024)